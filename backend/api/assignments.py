@@ -1,223 +1,294 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy import select, insert, delete, update, func, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List
 from datetime import datetime
-from db.session import get_db
+from db.session import get_async_db, async_engine, SessionLocal
 from db.users import User, UserRole
 from db.courses import Course
 from db.assignments import Assignment, Submission, SubmissionStatus
 from db.feedback import Feedback, FeedbackType
 from api.schemas.assignments import (
-    AssignmentCreate, AssignmentUpdate, AssignmentResponse,
-    SubmissionCreate, SubmissionGrade, SubmissionResponse, SubmissionUpdate
+    AssignmentCreate, AssignmentUpdate, AssignmentResponse, BulkGrade,
+    SubmissionGrade, SubmissionResponse, SubmissionUpdate
 )
 from api.dependencies import get_current_user, get_teacher_user
-from core.tts import generate_tts_audio
+from core.cache import cache_get, cache_set, cache_invalidate
+from core.ownership import course_owner_id
+from core.queue import enqueue_job
+from core.tts import generate_tts_audio_cached
+from pydantic import TypeAdapter
+
+# ON CONFLICT is dialect-specific; pick the variant matching the configured engine
+if async_engine.dialect.name == "postgresql":
+    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+else:
+    from sqlalchemy.dialects.sqlite import insert as dialect_insert
 
 router = APIRouter(prefix="/assignments", tags=["Assignments"])
 
+assignment_list_adapter = TypeAdapter(List[AssignmentResponse])
+
+# Hot-path statements built once at import; parameters are bound per call
+_Q_ASSIGNMENT_BY_ID = select(Assignment).where(Assignment.id == bindparam("assignment_id"))
+_Q_MY_SUBMISSION = select(Submission).where(
+    Submission.assignment_id == bindparam("assignment_id"),
+    Submission.student_id == bindparam("student_id")
+)
+
+
+def generate_instructions_tts_background(assignment_id: int, instructions: str, language: str = "en"):
+    """Background task to generate TTS audio for assignment instructions"""
+    db = SessionLocal()
+    try:
+        audio_url = generate_tts_audio_cached(instructions, language=language)
+
+        if audio_url:
+            db.execute(
+                update(Assignment)
+                .where(Assignment.id == assignment_id)
+                .values(instructions_audio_url=audio_url)
+            )
+            db.commit()
+            print(f"TTS audio generated successfully for assignment {assignment_id}")
+    except Exception as e:
+        print(f"Error generating TTS for assignment {assignment_id}: {e}")
+    finally:
+        db.close()
+
 
 @router.get("/course/{course_id}/my-submissions", response_model=List[SubmissionResponse])
-def get_my_course_submissions(
+async def get_my_course_submissions(
     course_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all submissions by the current student for a course"""
-    # Get all assignment IDs for this course
-    assignment_ids = db.query(Assignment.id).filter(
-        Assignment.course_id == course_id
-    ).all()
-    assignment_ids = [a[0] for a in assignment_ids]
-    
-    # Get all submissions for these assignments by this student
-    submissions = db.query(Submission).filter(
-        Submission.assignment_id.in_(assignment_ids),
-        Submission.student_id == current_user.id
-    ).all()
-    
+    # Single JOIN instead of fetching assignment IDs and filtering with IN (...)
+    result = await db.execute(
+        select(Submission)
+        .join(Assignment, Submission.assignment_id == Assignment.id)
+        .where(
+            Assignment.course_id == course_id,
+            Submission.student_id == current_user.id
+        )
+    )
+    submissions = result.scalars().all()
+
     return submissions
 
 
 @router.get("/course/{course_id}", response_model=List[AssignmentResponse])
-def get_course_assignments(
+async def get_course_assignments(
     course_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all assignments for a course"""
-    query = db.query(Assignment).filter(Assignment.course_id == course_id)
-    
+    cache_key = f"course:{course_id}:assignments:{current_user.role.value}"
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    query = select(Assignment).where(Assignment.course_id == course_id)
+
     # Students can only see published assignments
     if current_user.role == UserRole.STUDENT:
-        query = query.filter(Assignment.is_published == True)
-    
-    assignments = query.all()
-    return assignments
+        query = query.where(Assignment.is_published == True)
+
+    result = await db.execute(query)
+    assignments = result.scalars().all()
+
+    payload = assignment_list_adapter.dump_json(
+        [AssignmentResponse.model_validate(a) for a in assignments]
+    ).decode()
+    await cache_set(cache_key, payload)
+
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get("/{assignment_id}", response_model=AssignmentResponse)
-def get_assignment(
+async def get_assignment(
     assignment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get assignment by ID"""
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    result = await db.execute(_Q_ASSIGNMENT_BY_ID, {"assignment_id": assignment_id})
+    assignment = result.scalar_one_or_none()
     if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assignment not found"
         )
-    
+
     return assignment
 
 
 @router.post("/", response_model=AssignmentResponse, status_code=status.HTTP_201_CREATED)
-def create_assignment(
+async def create_assignment(
     assignment_data: AssignmentCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new assignment (Teacher/Admin only)"""
-    # Verify course ownership
-    course = db.query(Course).filter(Course.id == assignment_data.course_id).first()
-    if not course:
+    # Verify course ownership (cached, see core.ownership)
+    teacher_id = await course_owner_id(db, assignment_data.course_id)
+    if teacher_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
-    
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+
+    if current_user.role == UserRole.TEACHER and teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to add assignments to this course"
         )
-    
-    new_assignment = Assignment(
-        course_id=assignment_data.course_id,
-        title=assignment_data.title,
-        description=assignment_data.description,
-        instructions=assignment_data.instructions,
-        assignment_type=assignment_data.assignment_type,
-        max_score=assignment_data.max_score,
-        due_date=assignment_data.due_date,
-        allow_late_submission=assignment_data.allow_late_submission
+
+    result = await db.execute(
+        insert(Assignment)
+        .values(
+            course_id=assignment_data.course_id,
+            title=assignment_data.title,
+            description=assignment_data.description,
+            instructions=assignment_data.instructions,
+            assignment_type=assignment_data.assignment_type,
+            max_score=assignment_data.max_score,
+            due_date=assignment_data.due_date,
+            allow_late_submission=assignment_data.allow_late_submission
+        )
+        .returning(Assignment)
     )
-    
-    # Generate TTS for instructions
+    new_assignment = result.scalar_one()
+    await db.commit()
+
+    await cache_invalidate(f"course:{assignment_data.course_id}:assignments:")
+
+    # Generate TTS for instructions in the background; the audio URL shows up
+    # on the assignment once synthesis finishes
     if assignment_data.instructions:
-        audio_url = generate_tts_audio(
-            assignment_data.instructions,
-            language="en",
-            filename=f"assignment_{new_assignment.id}_instructions.mp3"
-        )
-        new_assignment.instructions_audio_url = audio_url
-    
-    db.add(new_assignment)
-    db.commit()
-    db.refresh(new_assignment)
-    
+        # Durable queue when configured, in-process background task otherwise
+        if not await enqueue_job("generate_instructions_tts", new_assignment.id, assignment_data.instructions):
+            background_tasks.add_task(
+                generate_instructions_tts_background,
+                new_assignment.id,
+                assignment_data.instructions
+            )
+
     return new_assignment
 
 
 @router.put("/{assignment_id}", response_model=AssignmentResponse)
-def update_assignment(
+async def update_assignment(
     assignment_id: int,
     assignment_data: AssignmentUpdate,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update assignment (Teacher/Admin only)"""
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    result = await db.execute(
+        select(Assignment)
+        .options(joinedload(Assignment.course))
+        .where(Assignment.id == assignment_id)
+    )
+    assignment = result.scalar_one_or_none()
     if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assignment not found"
         )
-    
-    # Check ownership
-    course = db.query(Course).filter(Course.id == assignment.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+
+    # Check ownership (course arrives with the assignment row)
+    if current_user.role == UserRole.TEACHER and assignment.course.teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to update this assignment"
         )
-    
+
     # Update fields
     update_data = assignment_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(assignment, field, value)
-    
-    db.commit()
-    db.refresh(assignment)
-    
+
+    await db.commit()
+    await db.refresh(assignment)
+
+    await cache_invalidate(f"course:{assignment.course_id}:assignments:")
+
     return assignment
 
 
 @router.delete("/{assignment_id}")
-def delete_assignment(
+async def delete_assignment(
     assignment_id: int,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete assignment (Teacher/Admin only)"""
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
-    if not assignment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Assignment not found"
+    # Single DELETE with the ownership check folded into the WHERE clause
+    stmt = delete(Assignment).where(Assignment.id == assignment_id)
+    if current_user.role == UserRole.TEACHER:
+        stmt = stmt.where(
+            Assignment.course_id.in_(
+                select(Course.id).where(Course.teacher_id == current_user.id)
+            )
         )
-    
-    # Check ownership
-    course = db.query(Course).filter(Course.id == assignment.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+
+    result = await db.execute(stmt.returning(Assignment.course_id))
+    deleted_course_id = result.scalar_one_or_none()
+    if deleted_course_id is None:
+        # Distinguish 404 from 403 with a cheap existence probe
+        exists = (await db.execute(
+            select(Assignment.id).where(Assignment.id == assignment_id)
+        )).scalar_one_or_none()
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Assignment not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to delete this assignment"
         )
-    
-    db.delete(assignment)
-    db.commit()
-    
+
+    await db.commit()
+
+    await cache_invalidate(f"course:{deleted_course_id}:assignments:")
+
     return {"message": "Assignment deleted successfully"}
 
 
-@router.post("/submit", response_model=SubmissionResponse, status_code=status.HTTP_201_CREATED)
-def submit_assignment(
-    submission_data: SubmissionCreate,
+@router.put("/{assignment_id}/submission", response_model=SubmissionResponse)
+async def submit_assignment(
+    assignment_id: int,
+    submission_data: SubmissionUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Submit an assignment (Student only)"""
+    """Create or update an assignment submission (Student only)"""
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students can submit assignments"
         )
-    
-    assignment = db.query(Assignment).filter(
-        Assignment.id == submission_data.assignment_id
-    ).first()
-    
+
+    # Only the deadline columns are needed here; skip full-row hydration
+    result = await db.execute(
+        select(Assignment.due_date, Assignment.allow_late_submission)
+        .where(Assignment.id == assignment_id)
+    )
+    assignment = result.first()
+
     if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assignment not found"
         )
-    
-    # Check if already submitted
-    existing = db.query(Submission).filter(
-        Submission.assignment_id == submission_data.assignment_id,
-        Submission.student_id == current_user.id
-    ).first()
-    
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Assignment already submitted"
-        )
-    
+
     # Check if late
     is_late = False
     if assignment.due_date and datetime.now() > assignment.due_date:
@@ -227,173 +298,231 @@ def submit_assignment(
                 detail="Assignment deadline has passed"
             )
         is_late = True
-    
-    submission = Submission(
-        assignment_id=submission_data.assignment_id,
+
+    # Atomic upsert on (assignment_id, student_id): first call inserts, a
+    # resubmission updates the same row — one statement, no race
+    stmt = dialect_insert(Submission).values(
+        assignment_id=assignment_id,
         student_id=current_user.id,
         text_answer=submission_data.text_answer,
         is_late=is_late,
         status=SubmissionStatus.SUBMITTED
     )
-    
-    db.add(submission)
-    db.commit()
-    db.refresh(submission)
-    
-    return submission
-
-
-# Update submission
-@router.post("/submit/{assignment_id}", response_model=SubmissionResponse)
-def update_submission(
-    assignment_id: int,
-    submission_data: SubmissionUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Update an existing assignment submission (Student only)"""
-    if current_user.role != UserRole.STUDENT:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only students can update submissions"
-        )
-    
-    submission = db.query(Submission).filter(
-        Submission.assignment_id == assignment_id,
-        Submission.student_id == current_user.id
-    ).first()
-    
-    if not submission:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Submission not found"
+    stmt = (
+        stmt.on_conflict_do_update(
+            index_elements=["assignment_id", "student_id"],
+            set_={
+                "text_answer": stmt.excluded.text_answer,
+                "is_late": stmt.excluded.is_late,
+                "status": SubmissionStatus.SUBMITTED,
+                "submitted_at": func.now()
+            }
         )
-    
-    assignment = db.query(Assignment).filter(
-        Assignment.id == assignment_id
-    ).first()
-    
-    if not assignment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Assignment not found"
-        )
-    
-    # Check if late
-    is_late = False
-    if assignment.due_date and datetime.now() > assignment.due_date:
-        if not assignment.allow_late_submission:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Assignment deadline has passed"
-            )
-        is_late = True
-    
-    # Update submission
-    submission.text_answer = submission_data.text_answer
-    submission.is_late = is_late
-    submission.status = SubmissionStatus.SUBMITTED
-    submission.submitted_at = datetime.now()
-    
-    db.commit()
-    db.refresh(submission)
-    
+        .returning(Submission)
+    )
+    result = await db.execute(stmt)
+    submission = result.scalar_one()
+    await db.commit()
+
     return submission
 
 
 @router.get("/{assignment_id}/submissions", response_model=List[SubmissionResponse])
-def get_assignment_submissions(
+async def get_assignment_submissions(
     assignment_id: int,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all submissions for an assignment (Teacher/Admin only)"""
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
+    result = await db.execute(
+        select(Assignment)
+        .options(joinedload(Assignment.course))
+        .where(Assignment.id == assignment_id)
+    )
+    assignment = result.scalar_one_or_none()
     if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assignment not found"
         )
-    
-    # Check ownership
-    course = db.query(Course).filter(Course.id == assignment.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+
+    # Check ownership (course arrives with the assignment row)
+    if current_user.role == UserRole.TEACHER and assignment.course.teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to view submissions for this assignment"
         )
-    
-    submissions = db.query(Submission).filter(
-        Submission.assignment_id == assignment_id
-    ).all()
-    
+
+    result = await db.execute(
+        select(Submission).where(Submission.assignment_id == assignment_id)
+    )
+    submissions = result.scalars().all()
+
     return submissions
 
 
 @router.get("/my-submissions/{assignment_id}", response_model=SubmissionResponse)
-def get_my_submission(
+async def get_my_submission(
     assignment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get student's own submission"""
-    submission = db.query(Submission).filter(
-        Submission.assignment_id == assignment_id,
-        Submission.student_id == current_user.id
-    ).first()
-    
+    result = await db.execute(
+        _Q_MY_SUBMISSION,
+        {"assignment_id": assignment_id, "student_id": current_user.id}
+    )
+    submission = result.scalar_one_or_none()
+
     if not submission:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Submission not found"
         )
-    
+
     return submission
 
 
+@router.post("/{assignment_id}/grade-bulk")
+async def grade_submissions_bulk(
+    assignment_id: int,
+    grade_data: BulkGrade,
+    current_user: User = Depends(get_teacher_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Grade multiple submissions of an assignment in one transaction (Teacher/Admin only)"""
+    if not grade_data.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No grades provided"
+        )
+
+    result = await db.execute(
+        select(Assignment)
+        .options(joinedload(Assignment.course))
+        .where(Assignment.id == assignment_id)
+    )
+    assignment = result.scalar_one_or_none()
+    if not assignment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignment not found"
+        )
+
+    # Check ownership (course arrives with the assignment row)
+    if current_user.role == UserRole.TEACHER and assignment.course.teacher_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to grade submissions for this assignment"
+        )
+
+    # Map submission ids to students, and verify they belong to this assignment
+    submission_ids = [item.submission_id for item in grade_data.items]
+    result = await db.execute(
+        select(Submission.id, Submission.student_id).where(
+            Submission.assignment_id == assignment_id,
+            Submission.id.in_(submission_ids)
+        )
+    )
+    student_by_submission = dict(result.all())
+
+    missing = set(submission_ids) - set(student_by_submission)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Submissions not found for this assignment: {sorted(missing)}"
+        )
+
+    # One batched UPDATE and one batched INSERT, single commit
+    graded_at = datetime.now()
+    await db.execute(
+        update(Submission),
+        [
+            {
+                "id": item.submission_id,
+                "score": item.score,
+                "status": SubmissionStatus.GRADED,
+                "graded_at": graded_at
+            }
+            for item in grade_data.items
+        ]
+    )
+
+    feedback_rows = [
+        {
+            "teacher_id": current_user.id,
+            "student_id": student_by_submission[item.submission_id],
+            "submission_id": item.submission_id,
+            "feedback_type": FeedbackType.ASSIGNMENT,
+            "text_feedback": item.feedback_text
+        }
+        for item in grade_data.items if item.feedback_text
+    ]
+    if feedback_rows:
+        await db.execute(insert(Feedback), feedback_rows)
+
+    await db.commit()
+
+    return {"message": "Submissions graded successfully", "graded": len(grade_data.items)}
+
+
 @router.post("/grade/{submission_id}")
-def grade_submission(
+async def grade_submission(
     submission_id: int,
     grade_data: SubmissionGrade,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Grade a submission (Teacher/Admin only)"""
-    submission = db.query(Submission).filter(Submission.id == submission_id).first()
-    if not submission:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Submission not found"
+    # Single UPDATE with the ownership check folded into the WHERE clause
+    stmt = (
+        update(Submission)
+        .where(Submission.id == submission_id)
+        .values(
+            score=grade_data.score,
+            status=SubmissionStatus.GRADED,
+            graded_at=func.now()
+        )
+        .returning(Submission.student_id)
+        .execution_options(synchronize_session=False)
+    )
+    if current_user.role == UserRole.TEACHER:
+        stmt = stmt.where(
+            Submission.assignment_id.in_(
+                select(Assignment.id)
+                .join(Course, Assignment.course_id == Course.id)
+                .where(Course.teacher_id == current_user.id)
+            )
         )
-    
-    # Check ownership
-    assignment = db.query(Assignment).filter(
-        Assignment.id == submission.assignment_id
-    ).first()
-    course = db.query(Course).filter(Course.id == assignment.course_id).first()
-    
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+
+    result = await db.execute(stmt)
+    student_id = result.scalar_one_or_none()
+    if student_id is None:
+        # Distinguish 404 from 403 with a cheap existence probe
+        exists = (await db.execute(
+            select(Submission.id).where(Submission.id == submission_id)
+        )).scalar_one_or_none()
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Submission not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to grade this submission"
         )
-    
-    # Update submission
-    submission.score = grade_data.score
-    submission.status = SubmissionStatus.GRADED
-    submission.graded_at = datetime.now()
-    
+
     # Add feedback if provided
     if grade_data.feedback_text:
         feedback = Feedback(
             teacher_id=current_user.id,
-            student_id=submission.student_id,
-            submission_id=submission.id,
+            student_id=student_id,
+            submission_id=submission_id,
             feedback_type=FeedbackType.ASSIGNMENT,
             text_feedback=grade_data.feedback_text
         )
         db.add(feedback)
-    
-    db.commit()
-    
+
+    await db.commit()
+
     return {"message": "Submission graded successfully", "score": grade_data.score}
@@ -1,18 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import datetime
-from db.session import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, insert, func, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.session import get_async_db
 from db.users import User, UserRole
 from api.schemas.auth import LoginSchema, TokenSchema
 from api.schemas.users import UserCreate, UserResponse, PasswordChange
-from core.security import verify_password, create_access_token, hash_password
+from core.security import verify_password, create_access_token, hash_password, password_needs_rehash
 from api.dependencies import get_current_user
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Hot-path statements built once at import; parameters are bound per call
+_Q_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new student user. Teachers and Admins can only be created by Admins."""
     # Only allow student registration through public endpoint
     if user_data.role != UserRole.STUDENT:
@@ -20,85 +24,99 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only student registration is allowed. Teachers and admins must be created by an administrator."
         )
-    
-    # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
+
+    # Check if email already exists (existence probe, no row hydration)
+    result = await db.execute(
+        select(User.id).where(User.email == user_data.email).limit(1)
+    )
+    if result.first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    
-    # Create new student user
-    new_user = User(
-        email=user_data.email,
-        password_hash=hash_password(user_data.password),
-        full_name=user_data.full_name,
-        role=UserRole.STUDENT,  # Force student role
-        is_blind=user_data.is_blind,
-        voice_speed=user_data.voice_speed,
-        preferred_language=user_data.preferred_language
+
+    # Create new student user (RETURNING brings back id and server defaults
+    # without a refresh round trip)
+    result = await db.execute(
+        insert(User)
+        .values(
+            email=user_data.email,
+            password_hash=await run_in_threadpool(hash_password, user_data.password),
+            full_name=user_data.full_name,
+            role=UserRole.STUDENT,  # Force student role
+            is_blind=user_data.is_blind,
+            voice_speed=user_data.voice_speed,
+            preferred_language=user_data.preferred_language
+        )
+        .returning(User)
     )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
+    new_user = result.scalar_one()
+    await db.commit()
+
     return new_user
 
 
 @router.post("/login", response_model=TokenSchema)
-def login(auth_data: LoginSchema, db: Session = Depends(get_db)):
+async def login(auth_data: LoginSchema, db: AsyncSession = Depends(get_async_db)):
     """Login user and return access token"""
-    user = db.query(User).filter(User.email == auth_data.email).first()
-    if not user or not verify_password(auth_data.password, user.password_hash):
+    result = await db.execute(_Q_USER_BY_EMAIL, {"email": auth_data.email})
+    user = result.scalar_one_or_none()
+    if not user or not await run_in_threadpool(
+        verify_password, auth_data.password, user.password_hash
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
-    
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
-    
-    # Update last login
-    user.last_login = datetime.now()
-    db.commit()
-    
+
+    # Transparently upgrade legacy bcrypt hashes on successful login
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await run_in_threadpool(hash_password, auth_data.password)
+
+    # Update last login (database clock, consistent across workers)
+    user.last_login = func.now()
+    await db.commit()
+
     token_data = {
         "user_id": user.id,
         "role": user.role.value,
         "is_active": user.is_active
     }
     access_token = create_access_token(token_data)
-    
+
     return TokenSchema(access_token=access_token)
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_profile(current_user: User = Depends(get_current_user)):
+async def get_current_user_profile(current_user: User = Depends(get_current_user)):
     """Get current user profile"""
     return current_user
 
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     password_data: PasswordChange,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Change user password"""
-    if not verify_password(password_data.old_password, current_user.password_hash):
+    if not await run_in_threadpool(
+        verify_password, password_data.old_password, current_user.password_hash
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect old password"
         )
-    
-    current_user.password_hash = hash_password(password_data.new_password)
-    db.commit()
-    
-    return {"message": "Password changed successfully"}
 
+    current_user.password_hash = await run_in_threadpool(
+        hash_password, password_data.new_password
+    )
+    await db.commit()
 
+    return {"message": "Password changed successfully"}
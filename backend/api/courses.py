@@ -1,59 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import Response
+from sqlalchemy import select, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+from db.session import get_async_db
 from db.users import User, UserRole
 from db.courses import Course, Enrollment
 from api.schemas.courses import CourseCreate, CourseUpdate, CourseResponse, EnrollmentResponse
 from api.dependencies import get_current_user, get_teacher_user
-from datetime import datetime
+from core.cache import cache_get, cache_set, cache_invalidate
+from core.ownership import course_owner_id, invalidate_course_owner
+from pydantic import TypeAdapter
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
+course_list_adapter = TypeAdapter(List[CourseResponse])
+
 
 @router.get("/", response_model=List[CourseResponse])
-def get_all_courses(
-    skip: int = 0,
+async def get_all_courses(
+    cursor_id: Optional[int] = Query(None),
     limit: int = 100,
     published_only: bool = False,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all courses"""
-    query = db.query(Course)
-    
+    """Get all courses, newest first. Pass the last row's id as `cursor_id` to page."""
+    cache_key = f"courses:{cursor_id}:{limit}:{published_only}:{current_user.role.value}"
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    query = select(Course)
+
     # Students can only see published courses
     if current_user.role == UserRole.STUDENT or published_only:
-        query = query.filter(Course.is_published == True, Course.is_active == True)
-    
-    courses = query.offset(skip).limit(limit).all()
-    return courses
+        query = query.where(Course.is_published == True, Course.is_active == True)
+
+    # Keyset pagination on the primary key alone: ids are monotonic, so id
+    # order matches insertion order, and comparing integers sidesteps the
+    # SQLite text-vs-bound-datetime precision mismatch that made a
+    # (created_at, id) cursor re-return rows sharing the cursor timestamp
+    if cursor_id is not None:
+        query = query.where(Course.id < cursor_id)
+
+    result = await db.execute(
+        query.order_by(Course.id.desc()).limit(limit)
+    )
+    courses = result.scalars().all()
+
+    payload = course_list_adapter.dump_json(
+        [CourseResponse.model_validate(c) for c in courses]
+    ).decode()
+    await cache_set(cache_key, payload)
+
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get("/my-courses", response_model=List[CourseResponse])
-def get_my_courses(
+async def get_my_courses(
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get courses created by current teacher"""
-    courses = db.query(Course).filter(Course.teacher_id == current_user.id).all()
+    result = await db.execute(
+        select(Course).where(Course.teacher_id == current_user.id)
+    )
+    courses = result.scalars().all()
     return courses
 
 
 @router.get("/{course_id}", response_model=CourseResponse)
-def get_course(
+async def get_course(
     course_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get course by ID"""
-    course = db.query(Course).filter(Course.id == course_id).first()
+    cache_key = f"course:{course_id}:{current_user.role.value}"
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    # Primary-key fast path: served from the identity map when already loaded
+    course = await db.get(Course, course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
-    
+
     # Check permissions
     if current_user.role == UserRole.STUDENT:
         if not course.is_published or not course.is_active:
@@ -61,96 +98,115 @@ def get_course(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Course is not available"
             )
-    
-    return course
+
+    payload = CourseResponse.model_validate(course).model_dump_json()
+    await cache_set(cache_key, payload)
+
+    return Response(content=payload, media_type="application/json")
 
 
 @router.post("/", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
-def create_course(
+async def create_course(
     course_data: CourseCreate,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new course (Teacher/Admin only)"""
-    new_course = Course(
-        teacher_id=current_user.id,
-        title=course_data.title,
-        description=course_data.description,
-        subject_code=course_data.subject_code
+    result = await db.execute(
+        insert(Course)
+        .values(
+            teacher_id=current_user.id,
+            title=course_data.title,
+            description=course_data.description,
+            subject_code=course_data.subject_code
+        )
+        .returning(Course)
     )
-    
-    db.add(new_course)
-    db.commit()
-    db.refresh(new_course)
-    
+    new_course = result.scalar_one()
+    await db.commit()
+
+    await cache_invalidate("courses:")
+
     return new_course
 
 
 @router.put("/{course_id}", response_model=CourseResponse)
-def update_course(
+async def update_course(
     course_id: int,
     course_data: CourseUpdate,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update course (Teacher/Admin only)"""
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = await db.get(Course, course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
-    
+
     # Check ownership
     if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to update this course"
         )
-    
+
     # Update fields
     update_data = course_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(course, field, value)
-    
-    db.commit()
-    db.refresh(course)
-    
+
+    await db.commit()
+    await db.refresh(course)
+
+    invalidate_course_owner(course_id)
+    await cache_invalidate("courses:", f"course:{course_id}:")
+
     return course
 
 
 @router.delete("/{course_id}")
-def delete_course(
+async def delete_course(
     course_id: int,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete course (Teacher/Admin only)"""
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    # Check ownership
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+    # Single DELETE with the ownership check folded into the WHERE clause
+    stmt = delete(Course).where(Course.id == course_id)
+    if current_user.role == UserRole.TEACHER:
+        stmt = stmt.where(Course.teacher_id == current_user.id)
+
+    result = await db.execute(stmt)
+    if result.rowcount == 0:
+        # Distinguish 404 from 403 with a cheap existence probe
+        exists = (await db.execute(
+            select(Course.id).where(Course.id == course_id)
+        )).scalar_one_or_none()
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to delete this course"
         )
-    
-    db.delete(course)
-    db.commit()
-    
+
+    await db.commit()
+
+    invalidate_course_owner(course_id)
+    await cache_invalidate("courses:", f"course:{course_id}:")
+
     return {"message": "Course deleted successfully"}
 
 
 @router.post("/{course_id}/enroll", response_model=EnrollmentResponse)
-def enroll_in_course(
+async def enroll_in_course(
     course_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Enroll in a course (Student only)"""
     if current_user.role != UserRole.STUDENT:
@@ -158,42 +214,52 @@ def enroll_in_course(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students can enroll in courses"
         )
-    
-    course = db.query(Course).filter(Course.id == course_id).first()
+
+    # Only the availability flags are needed here; skip full-row hydration
+    result = await db.execute(
+        select(Course.is_published, Course.is_active).where(Course.id == course_id)
+    )
+    course = result.first()
     if not course or not course.is_published or not course.is_active:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not available"
         )
-    
-    # Check if already enrolled
-    existing = db.query(Enrollment).filter(
-        Enrollment.student_id == current_user.id,
-        Enrollment.course_id == course_id
-    ).first()
-    
-    if existing:
+
+    # Check if already enrolled (existence probe, no row hydration)
+    result = await db.execute(
+        select(Enrollment.id).where(
+            Enrollment.student_id == current_user.id,
+            Enrollment.course_id == course_id
+        ).limit(1)
+    )
+
+    if result.first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Already enrolled in this course"
         )
-    
-    enrollment = Enrollment(
-        student_id=current_user.id,
-        course_id=course_id
+
+    result = await db.execute(
+        insert(Enrollment)
+        .values(
+            student_id=current_user.id,
+            course_id=course_id
+        )
+        .returning(Enrollment)
     )
-    
-    db.add(enrollment)
-    db.commit()
-    db.refresh(enrollment)
-    
+    enrollment = result.scalar_one()
+    await db.commit()
+    # Load the nested course for the response (already fetched above, so cheap)
+    await db.refresh(enrollment, ["course"])
+
     return enrollment
 
 
 @router.get("/enrolled/my-enrollments", response_model=List[EnrollmentResponse])
-def get_my_enrollments(
+async def get_my_enrollments(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's enrollments"""
     if current_user.role != UserRole.STUDENT:
@@ -201,35 +267,45 @@ def get_my_enrollments(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students have enrollments"
         )
-    
-    enrollments = db.query(Enrollment).filter(
-        Enrollment.student_id == current_user.id,
-        Enrollment.is_active == True
-    ).all()
-    
+
+    result = await db.execute(
+        select(Enrollment)
+        .options(selectinload(Enrollment.course))
+        .where(
+            Enrollment.student_id == current_user.id,
+            Enrollment.is_active == True
+        )
+    )
+    enrollments = result.scalars().all()
+
     return enrollments
 
 
 @router.get("/{course_id}/enrollments", response_model=List[EnrollmentResponse])
-def get_course_enrollments(
+async def get_course_enrollments(
     course_id: int,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all enrollments for a course (Teacher/Admin only)"""
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
+    teacher_id = await course_owner_id(db, course_id)
+    if teacher_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
-    
+
     # Check ownership
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+    if current_user.role == UserRole.TEACHER and teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to view enrollments for this course"
         )
-    
-    enrollments = db.query(Enrollment).filter(Enrollment.course_id == course_id).all()
+
+    result = await db.execute(
+        select(Enrollment)
+        .options(selectinload(Enrollment.course))
+        .where(Enrollment.course_id == course_id)
+    )
+    enrollments = result.scalars().all()
     return enrollments
@@ -1,17 +1,22 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from jose import jwt, JWTError
-from db.session import get_db
+from sqlalchemy import select, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+import jwt
+from db.session import get_async_db
 from db.users import User, UserRole
 from core.security import SECRET_KEY, ALGORITHM
 
 security = HTTPBearer()
 
+# Built once at import: this runs on every authenticated request, so skip
+# re-constructing the select() per call and bind the id at execution time
+_Q_USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current authenticated user"""
     try:
@@ -23,13 +28,14 @@ async def get_current_user(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials"
             )
-    except JWTError:
+    except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
         )
-    
-    user = db.query(User).filter(User.id == user_id).first()
+
+    result = await db.execute(_Q_USER_BY_ID, {"user_id": user_id})
+    user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
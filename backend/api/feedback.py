@@ -1,50 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, insert, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from db.session import get_async_db
 from db.users import User, UserRole
 from db.feedback import Feedback
 from api.schemas.feedback import FeedbackCreate, FeedbackResponse
 from api.dependencies import get_current_user, get_teacher_user
-from datetime import datetime
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
 
 
 @router.post("/", response_model=FeedbackResponse, status_code=status.HTTP_201_CREATED)
-def create_feedback(
+async def create_feedback(
     feedback_data: FeedbackCreate,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create feedback for a student (Teacher/Admin only)"""
-    # Verify student exists
-    student = db.query(User).filter(User.id == feedback_data.student_id).first()
-    if not student or student.role != UserRole.STUDENT:
+    # Verify student exists (only the role column is needed)
+    result = await db.execute(
+        select(User.role).where(User.id == feedback_data.student_id)
+    )
+    student_role = result.scalar_one_or_none()
+    if student_role != UserRole.STUDENT:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student not found"
         )
-    
-    new_feedback = Feedback(
-        teacher_id=current_user.id,
-        student_id=feedback_data.student_id,
-        submission_id=feedback_data.submission_id,
-        feedback_type=feedback_data.feedback_type,
-        text_feedback=feedback_data.text_feedback
+
+    result = await db.execute(
+        insert(Feedback)
+        .values(
+            teacher_id=current_user.id,
+            student_id=feedback_data.student_id,
+            submission_id=feedback_data.submission_id,
+            feedback_type=feedback_data.feedback_type,
+            text_feedback=feedback_data.text_feedback
+        )
+        .returning(Feedback)
     )
-    
-    db.add(new_feedback)
-    db.commit()
-    db.refresh(new_feedback)
-    
+    new_feedback = result.scalar_one()
+    await db.commit()
+
     return new_feedback
 
 
 @router.get("/received", response_model=List[FeedbackResponse])
-def get_my_feedback(
+async def get_my_feedback(
+    cursor_id: Optional[int] = Query(None),
+    limit: int = 50,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get feedback received by current user"""
     if current_user.role != UserRole.STUDENT:
@@ -52,63 +59,104 @@ def get_my_feedback(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students can view received feedback"
         )
-    
-    feedback = db.query(Feedback).filter(
-        Feedback.student_id == current_user.id
-    ).order_by(Feedback.created_at.desc()).all()
-    
+
+    query = select(Feedback).where(Feedback.student_id == current_user.id)
+
+    # Keyset pagination on the primary key: id order matches insertion
+    # order, and an integer comparison avoids the SQLite datetime precision
+    # mismatch that made (created_at, id) cursors re-return rows
+    if cursor_id is not None:
+        query = query.where(Feedback.id < cursor_id)
+
+    result = await db.execute(
+        query.order_by(Feedback.id.desc()).limit(limit)
+    )
+    feedback = result.scalars().all()
+
     return feedback
 
 
 @router.get("/given", response_model=List[FeedbackResponse])
-def get_given_feedback(
+async def get_given_feedback(
+    cursor_id: Optional[int] = Query(None),
+    limit: int = 50,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get feedback given by current teacher"""
-    feedback = db.query(Feedback).filter(
-        Feedback.teacher_id == current_user.id
-    ).order_by(Feedback.created_at.desc()).all()
-    
+    query = select(Feedback).where(Feedback.teacher_id == current_user.id)
+
+    # Keyset pagination on the primary key: id order matches insertion
+    # order, and an integer comparison avoids the SQLite datetime precision
+    # mismatch that made (created_at, id) cursors re-return rows
+    if cursor_id is not None:
+        query = query.where(Feedback.id < cursor_id)
+
+    result = await db.execute(
+        query.order_by(Feedback.id.desc()).limit(limit)
+    )
+    feedback = result.scalars().all()
+
     return feedback
 
 
 @router.put("/{feedback_id}/read")
-def mark_feedback_read(
+async def mark_feedback_read(
     feedback_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark feedback as read"""
-    feedback = db.query(Feedback).filter(Feedback.id == feedback_id).first()
-    if not feedback:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Feedback not found"
+    # Single UPDATE with the ownership check folded into the WHERE clause
+    result = await db.execute(
+        update(Feedback)
+        .where(
+            Feedback.id == feedback_id,
+            Feedback.student_id == current_user.id
         )
-    
-    if feedback.student_id != current_user.id:
+        .values(is_read=True, read_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        # Distinguish 404 from 403 with a cheap existence probe
+        exists = (await db.execute(
+            select(Feedback.id).where(Feedback.id == feedback_id)
+        )).scalar_one_or_none()
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Feedback not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to mark this feedback as read"
         )
-    
-    feedback.is_read = True
-    feedback.read_at = datetime.now()
-    db.commit()
-    
+
+    await db.commit()
+
     return {"message": "Feedback marked as read"}
 
 
 @router.get("/student/{student_id}", response_model=List[FeedbackResponse])
-def get_student_feedback(
+async def get_student_feedback(
     student_id: int,
+    cursor_id: Optional[int] = Query(None),
+    limit: int = 50,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all feedback for a specific student (Teacher/Admin only)"""
-    feedback = db.query(Feedback).filter(
-        Feedback.student_id == student_id
-    ).order_by(Feedback.created_at.desc()).all()
-    
+    query = select(Feedback).where(Feedback.student_id == student_id)
+
+    # Keyset pagination on the primary key: id order matches insertion
+    # order, and an integer comparison avoids the SQLite datetime precision
+    # mismatch that made (created_at, id) cursors re-return rows
+    if cursor_id is not None:
+        query = query.where(Feedback.id < cursor_id)
+
+    result = await db.execute(
+        query.order_by(Feedback.id.desc()).limit(limit)
+    )
+    feedback = result.scalars().all()
+
     return feedback
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, delete, update, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
-from db.session import get_db, SessionLocal
+from db.session import get_async_db, SessionLocal, async_engine
 from db.users import User, UserRole
 from db.courses import Course, Enrollment
 from db.lessons import Lesson, LessonAudio, LessonProgress
@@ -10,8 +12,17 @@ from api.schemas.lessons import (
     LessonProgressResponse, LessonProgressUpdate
 )
 from api.dependencies import get_current_user, get_teacher_user
-from core.tts import generate_tts_audio
-from datetime import datetime
+from core.cache import cache_get, cache_set, cache_invalidate
+from core.ownership import course_owner_id
+from core.queue import enqueue_job
+from core.tts import generate_tts_audio_cached
+from fastapi.responses import Response, StreamingResponse
+
+# ON CONFLICT is dialect-specific; pick the variant matching the configured engine
+if async_engine.dialect.name == "postgresql":
+    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+else:
+    from sqlalchemy.dialects.sqlite import insert as dialect_insert
 
 router = APIRouter(prefix="/lessons", tags=["Lessons"])
 
@@ -20,388 +31,467 @@ def generate_tts_background(lesson_id: int, content_text: str, language: str = "
     """Background task to generate TTS audio for a lesson"""
     db = SessionLocal()
     try:
-        audio_url = generate_tts_audio(
-            content_text,
-            language=language,
-            filename=f"lesson_{lesson_id}.mp3"
-        )
-        
+        # Content-hash cache: identical text+language reuses the stored file,
+        # so a re-save with unchanged content skips synthesis entirely
+        audio_url = generate_tts_audio_cached(content_text, language=language)
+
         if audio_url:
-            # Check if audio record already exists
-            lesson_audio = db.query(LessonAudio).filter(
-                LessonAudio.lesson_id == lesson_id
-            ).first()
-            
-            if lesson_audio:
-                lesson_audio.audio_url = audio_url
-                lesson_audio.is_processed = True
-                lesson_audio.processing_error = None
-            else:
-                lesson_audio = LessonAudio(
+            # Atomic upsert on lesson_id: one statement whether the record
+            # exists or not, and safe under concurrent TTS completions
+            db.execute(
+                dialect_insert(LessonAudio)
+                .values(
                     lesson_id=lesson_id,
                     audio_url=audio_url,
                     language=language,
                     is_processed=True
                 )
-                db.add(lesson_audio)
-            
+                .on_conflict_do_update(
+                    index_elements=["lesson_id"],
+                    set_=dict(
+                        audio_url=audio_url,
+                        is_processed=True,
+                        processing_error=None
+                    )
+                )
+            )
             db.commit()
             print(f"TTS audio generated successfully for lesson {lesson_id}")
         else:
             # Mark as failed
-            lesson_audio = db.query(LessonAudio).filter(
-                LessonAudio.lesson_id == lesson_id
-            ).first()
-            if lesson_audio:
-                lesson_audio.processing_error = "Failed to generate audio"
-                db.commit()
+            db.execute(
+                update(LessonAudio)
+                .where(LessonAudio.lesson_id == lesson_id)
+                .values(processing_error="Failed to generate audio")
+            )
+            db.commit()
     except Exception as e:
         print(f"Error generating TTS for lesson {lesson_id}: {e}")
         # Mark as failed
-        lesson_audio = db.query(LessonAudio).filter(
-            LessonAudio.lesson_id == lesson_id
-        ).first()
-        if lesson_audio:
-            lesson_audio.processing_error = str(e)
-            db.commit()
+        db.rollback()
+        db.execute(
+            update(LessonAudio)
+            .where(LessonAudio.lesson_id == lesson_id)
+            .values(processing_error=str(e))
+        )
+        db.commit()
     finally:
         db.close()
 
 
-def lesson_to_response(lesson: Lesson, db: Session) -> dict:
-    """Convert lesson model to response dict with audio_url"""
-    lesson_audio = db.query(LessonAudio).filter(LessonAudio.lesson_id == lesson.id).first()
-    
-    # Determine TTS status
-    tts_status = "none"  # No TTS requested
-    if lesson_audio:
-        if lesson_audio.processing_error:
-            tts_status = "error"
-        elif lesson_audio.is_processed and lesson_audio.audio_url:
-            tts_status = "ready"
-        else:
-            tts_status = "processing"
-    
-    return {
-        "id": lesson.id,
-        "course_id": lesson.course_id,
-        "title": lesson.title,
-        "description": lesson.description,
-        "content_text": lesson.content_text,
-        "content_type": lesson.content_type,
-        "order_index": lesson.order_index,
-        "file_url": lesson.file_url,
-        "audio_url": lesson_audio.audio_url if lesson_audio and lesson_audio.is_processed else None,
-        "tts_status": tts_status,
-        "duration": lesson.duration,
-        "duration_minutes": lesson.duration // 60 if lesson.duration else 10,
-        "is_published": lesson.is_published,
-        "created_at": lesson.created_at,
-        "updated_at": lesson.updated_at
-    }
-
-
 @router.get("/course/{course_id}", response_model=List[LessonResponse])
-def get_course_lessons(
+async def get_course_lessons(
     course_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all lessons for a course"""
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
+    cache_key = f"course:{course_id}:lessons:{current_user.role.value}"
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    # Existence probe, no row hydration
+    exists = (await db.execute(
+        select(Course.id).where(Course.id == course_id)
+    )).scalar_one_or_none()
+    if exists is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
-    
-    query = db.query(Lesson).filter(Lesson.course_id == course_id)
-    
+
+    # Eager-load audio alongside the lessons (two queries total) instead of
+    # one LessonAudio SELECT per lesson
+    query = select(Lesson).options(selectinload(Lesson.audio)).where(
+        Lesson.course_id == course_id
+    )
+
     # Students can only see published lessons
     if current_user.role == UserRole.STUDENT:
-        query = query.filter(Lesson.is_published == True)
-    
-    lessons = query.order_by(Lesson.order_index).all()
-    return [lesson_to_response(lesson, db) for lesson in lessons]
+        query = query.where(Lesson.is_published == True)
+
+    # Stream the JSON array while rows arrive in yield_per batches: memory
+    # stays bounded for huge courses and first bytes go out before the full
+    # result set is fetched. The assembled payload still feeds the cache.
+    async def lesson_stream():
+        chunks = []
+        yield b"["
+        result = await db.stream(
+            query.order_by(Lesson.order_index).execution_options(yield_per=200)
+        )
+        async for lesson in result.scalars():
+            piece = LessonResponse.model_validate(lesson).model_dump_json()
+            if chunks:
+                piece = "," + piece
+            chunks.append(piece)
+            yield piece.encode()
+        yield b"]"
+        await cache_set(cache_key, "[" + "".join(chunks) + "]")
+
+    return StreamingResponse(lesson_stream(), media_type="application/json")
 
 
 @router.get("/{lesson_id}", response_model=LessonResponse)
-def get_lesson(
+async def get_lesson(
     lesson_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get lesson by ID"""
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+    # Primary-key fast path: served from the identity map when already loaded
+    lesson = await db.get(
+        Lesson, lesson_id, options=[selectinload(Lesson.audio)]
+    )
     if not lesson:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lesson not found"
         )
-    
+
     # Check permissions
     if current_user.role == UserRole.STUDENT and not lesson.is_published:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Lesson is not published"
         )
-    
-    return lesson_to_response(lesson, db)
+
+    return LessonResponse.model_validate(lesson)
 
 
 @router.post("/", response_model=LessonResponse, status_code=status.HTTP_201_CREATED)
-def create_lesson(
+async def create_lesson(
     lesson_data: LessonCreate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new lesson (Teacher/Admin only)"""
-    # Verify course ownership
-    course = db.query(Course).filter(Course.id == lesson_data.course_id).first()
-    if not course:
+    # Verify course ownership (cached, see core.ownership)
+    teacher_id = await course_owner_id(db, lesson_data.course_id)
+    if teacher_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
-    
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+
+    if current_user.role == UserRole.TEACHER and teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to add lessons to this course"
         )
-    
-    new_lesson = Lesson(
-        course_id=lesson_data.course_id,
-        title=lesson_data.title,
-        description=lesson_data.description,
-        content_text=lesson_data.content_text,
-        content_type=lesson_data.content_type,
-        order_index=lesson_data.order_index,
-        is_published=lesson_data.is_published
+
+    result = await db.execute(
+        insert(Lesson)
+        .values(
+            course_id=lesson_data.course_id,
+            title=lesson_data.title,
+            description=lesson_data.description,
+            content_text=lesson_data.content_text,
+            content_type=lesson_data.content_type,
+            order_index=lesson_data.order_index,
+            is_published=lesson_data.is_published
+        )
+        .returning(Lesson)
     )
-    
-    db.add(new_lesson)
-    db.commit()
-    db.refresh(new_lesson)
-    
+    new_lesson = result.scalar_one()
+
     # Create a placeholder audio record and generate TTS in background
     if lesson_data.content_text:
         # Create placeholder record to track processing status
-        lesson_audio = LessonAudio(
-            lesson_id=new_lesson.id,
-            audio_url="",  # Will be filled by background task
-            language="en",
-            is_processed=False  # Mark as processing
-        )
-        db.add(lesson_audio)
-        db.commit()
-        
-        # Add background task for TTS generation
-        background_tasks.add_task(
-            generate_tts_background,
-            new_lesson.id,
-            lesson_data.content_text,
-            "en"
+        await db.execute(
+            insert(LessonAudio).values(
+                lesson_id=new_lesson.id,
+                audio_url="",  # Will be filled by background task
+                language="en",
+                is_processed=False  # Mark as processing
+            )
         )
-    
-    return lesson_to_response(new_lesson, db)
+
+        # Durable queue when configured, in-process background task otherwise
+        if not await enqueue_job("generate_tts", new_lesson.id, lesson_data.content_text, "en"):
+            background_tasks.add_task(
+                generate_tts_background,
+                new_lesson.id,
+                lesson_data.content_text,
+                "en"
+            )
+
+    await db.commit()
+
+    await cache_invalidate(f"course:{lesson_data.course_id}:lessons:")
+
+    # The audio state is already known (placeholder just written, or none
+    # requested) — build the response inline instead of re-querying it
+    return {
+        "id": new_lesson.id,
+        "course_id": new_lesson.course_id,
+        "title": new_lesson.title,
+        "description": new_lesson.description,
+        "content_text": new_lesson.content_text,
+        "content_type": new_lesson.content_type,
+        "order_index": new_lesson.order_index,
+        "file_url": new_lesson.file_url,
+        "audio_url": None,
+        "tts_status": "processing" if lesson_data.content_text else "none",
+        "duration": new_lesson.duration,
+        "is_published": new_lesson.is_published,
+        "created_at": new_lesson.created_at,
+        "updated_at": new_lesson.updated_at
+    }
 
 
 @router.put("/{lesson_id}", response_model=LessonResponse)
-def update_lesson(
+async def update_lesson(
     lesson_id: int,
     lesson_data: LessonUpdate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update lesson (Teacher/Admin only)"""
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
-    if not lesson:
+    # One joined query returns the lesson plus the owning teacher id —
+    # no separate Course fetch, and no full Course row hydrated
+    result = await db.execute(
+        select(Lesson, Course.teacher_id)
+        .join(Course, Course.id == Lesson.course_id)
+        .options(selectinload(Lesson.audio))
+        .where(Lesson.id == lesson_id)
+    )
+    row = result.first()
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lesson not found"
         )
-    
+    lesson, teacher_id = row
+
     # Check ownership
-    course = db.query(Course).filter(Course.id == lesson.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+    if current_user.role == UserRole.TEACHER and teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to update this lesson"
         )
-    
+
     # Update fields
     update_data = lesson_data.model_dump(exclude_unset=True)
-    
+
+    # A PUT that resends identical text should not re-synthesize audio or
+    # flip the existing recording back to "processing"
+    if "content_text" in update_data and update_data["content_text"] == lesson.content_text:
+        update_data.pop("content_text")
+
     # If content_text is updated, regenerate TTS in background
     if "content_text" in update_data and update_data["content_text"]:
         # Mark existing audio as processing
-        lesson_audio = db.query(LessonAudio).filter(
-            LessonAudio.lesson_id == lesson_id
-        ).first()
-        
+        lesson_audio = lesson.audio
+
         if lesson_audio:
             lesson_audio.is_processed = False
             lesson_audio.processing_error = None
         else:
-            lesson_audio = LessonAudio(
+            # Attach through the relationship so lesson.audio reflects the
+            # placeholder without a reload
+            lesson.audio = LessonAudio(
                 lesson_id=lesson_id,
                 audio_url="",
                 language="en",
                 is_processed=False
             )
-            db.add(lesson_audio)
-        
-        # Add background task for TTS generation
-        background_tasks.add_task(
-            generate_tts_background,
-            lesson_id,
-            update_data["content_text"],
-            "en"
-        )
-    
+
+        # Durable queue when configured, in-process background task otherwise
+        if not await enqueue_job("generate_tts", lesson_id, update_data["content_text"], "en"):
+            background_tasks.add_task(
+                generate_tts_background,
+                lesson_id,
+                update_data["content_text"],
+                "en"
+            )
+
     for field, value in update_data.items():
         setattr(lesson, field, value)
-    
-    db.commit()
-    db.refresh(lesson)
-    
-    return lesson_to_response(lesson, db)
+
+    await db.commit()
+
+    await cache_invalidate(f"course:{lesson.course_id}:lessons:")
+
+    # lesson.audio was eager-loaded (and mutated in place above), so the
+    # response needs no follow-up SELECT
+    return LessonResponse.model_validate(lesson)
 
 
 @router.delete("/{lesson_id}")
-def delete_lesson(
+async def delete_lesson(
     lesson_id: int,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete lesson (Teacher/Admin only)"""
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
-    if not lesson:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Lesson not found"
+    # Single DELETE with the ownership check folded into the WHERE clause
+    stmt = delete(Lesson).where(Lesson.id == lesson_id)
+    if current_user.role == UserRole.TEACHER:
+        stmt = stmt.where(
+            Lesson.course_id.in_(
+                select(Course.id).where(Course.teacher_id == current_user.id)
+            )
         )
-    
-    # Check ownership
-    course = db.query(Course).filter(Course.id == lesson.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+
+    result = await db.execute(stmt.returning(Lesson.course_id))
+    deleted_course_id = result.scalar_one_or_none()
+    if deleted_course_id is None:
+        # Distinguish 404 from 403 with a cheap existence probe
+        exists = (await db.execute(
+            select(Lesson.id).where(Lesson.id == lesson_id)
+        )).scalar_one_or_none()
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Lesson not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to delete this lesson"
         )
-    
-    db.delete(lesson)
-    db.commit()
-    
+
+    await db.commit()
+
+    await cache_invalidate(f"course:{deleted_course_id}:lessons:")
+
     return {"message": "Lesson deleted successfully"}
 
 
 @router.get("/progress/course/{course_id}", response_model=List[LessonProgressResponse])
-def get_course_progress(
+async def get_course_progress(
     course_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get student's progress for all lessons in a course"""
-    # Get all lesson IDs for this course
-    lesson_ids = db.query(Lesson.id).filter(Lesson.course_id == course_id).all()
-    lesson_ids = [l[0] for l in lesson_ids]
-    
-    # Get progress for these lessons
-    progress_list = db.query(LessonProgress).filter(
-        LessonProgress.lesson_id.in_(lesson_ids),
-        LessonProgress.student_id == current_user.id
-    ).all()
-    
+    # Single JOIN instead of materializing lesson IDs into an IN (...) list
+    result = await db.execute(
+        select(LessonProgress)
+        .join(Lesson, LessonProgress.lesson_id == Lesson.id)
+        .where(
+            Lesson.course_id == course_id,
+            LessonProgress.student_id == current_user.id
+        )
+    )
+    progress_list = result.scalars().all()
+
     return progress_list
 
 
 @router.get("/{lesson_id}/progress", response_model=LessonProgressResponse)
-def get_lesson_progress(
+async def get_lesson_progress(
     lesson_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get student's progress for a lesson (creates if not exists)"""
-    progress = db.query(LessonProgress).filter(
-        LessonProgress.lesson_id == lesson_id,
-        LessonProgress.student_id == current_user.id
-    ).first()
-    
+    result = await db.execute(
+        select(LessonProgress).where(
+            LessonProgress.lesson_id == lesson_id,
+            LessonProgress.student_id == current_user.id
+        )
+    )
+    progress = result.scalar_one_or_none()
+
     if not progress:
         # Create new progress entry
-        progress = LessonProgress(
-            student_id=current_user.id,
-            lesson_id=lesson_id
+        result = await db.execute(
+            insert(LessonProgress)
+            .values(
+                student_id=current_user.id,
+                lesson_id=lesson_id
+            )
+            .returning(LessonProgress)
         )
-        db.add(progress)
-        db.commit()
-        db.refresh(progress)
-    
+        progress = result.scalar_one()
+        await db.commit()
+
     return progress
 
 
 @router.put("/{lesson_id}/progress", response_model=LessonProgressResponse)
-def update_lesson_progress(
+async def update_lesson_progress(
     lesson_id: int,
     progress_data: LessonProgressUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update student's progress for a lesson"""
-    progress = db.query(LessonProgress).filter(
-        LessonProgress.lesson_id == lesson_id,
-        LessonProgress.student_id == current_user.id
-    ).first()
-    
+    result = await db.execute(
+        select(LessonProgress).where(
+            LessonProgress.lesson_id == lesson_id,
+            LessonProgress.student_id == current_user.id
+        )
+    )
+    progress = result.scalar_one_or_none()
+
     if not progress:
         progress = LessonProgress(
             student_id=current_user.id,
             lesson_id=lesson_id
         )
         db.add(progress)
-    
+
     # Update fields
     update_data = progress_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(progress, field, value)
-    
+
     # Update completion status
     if progress_data.completed:
         progress.is_completed = True
-        progress.completed_at = datetime.now()
+        # Database clock: consistent across workers and atomic with the commit
+        progress.completed_at = func.now()
         progress.completion_percentage = 100
-        
-        # Update course progress will be handled here
-        course = progress.lesson.course
-        
-        enrollment = db.query(Enrollment).filter(
-            Enrollment.course_id == course.id,
-            Enrollment.student_id == current_user.id
-        ).first()
-        
+
+        # Only the course id is needed here (also safe for a progress row
+        # that was just created and has no loaded lesson yet)
+        course_id = (await db.execute(
+            select(Lesson.course_id).where(Lesson.id == lesson_id)
+        )).scalar_one_or_none()
+
+        result = await db.execute(
+            select(Enrollment).where(
+                Enrollment.course_id == course_id,
+                Enrollment.student_id == current_user.id
+            )
+        )
+        enrollment = result.scalar_one_or_none()
+
         if enrollment:
-            # Calculate overall course progress
-            total_lessons = db.query(Lesson).filter(Lesson.course_id == course.id, Lesson.is_published == True).count()
-            completed_lessons = db.query(LessonProgress).join(Lesson).filter(
-                Lesson.course_id == course.id,
-                LessonProgress.student_id == current_user.id,
-                LessonProgress.is_completed == True
-            ).count()
-            
+            # Make the progress row above visible to the count below
+            await db.flush()
+
+            # Total and completed lesson counts in one grouped query
+            total_lessons, completed_lessons = (await db.execute(
+                select(
+                    func.count(Lesson.id),
+                    func.count(LessonProgress.id)
+                )
+                .select_from(Lesson)
+                .outerjoin(
+                    LessonProgress,
+                    and_(
+                        LessonProgress.lesson_id == Lesson.id,
+                        LessonProgress.student_id == current_user.id,
+                        LessonProgress.is_completed == True
+                    )
+                )
+                .where(
+                    Lesson.course_id == course_id,
+                    Lesson.is_published == True
+                )
+            )).one()
+
             enrollment.progress_percentage = (completed_lessons / total_lessons) * 100 if total_lessons > 0 else 0
             if enrollment.progress_percentage == 100:
-                enrollment.completion_date = datetime.now()
+                enrollment.completion_date = func.now()
                 enrollment.completed = True
-                
-        
-        
-        
-    
-    db.commit()
-    db.refresh(progress)
-    
+
+    await db.commit()
+    await db.refresh(progress)
+
     return progress
@@ -1,79 +1,227 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import select, insert, update, delete, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List
 from datetime import datetime
 import json
-from db.session import get_db
+from db.session import get_async_db, SessionLocal
 from db.users import User, UserRole
 from db.courses import Course
-from db.quizzes import Quiz, Question, QuizAttempt, Answer, QuestionType
+from db.quizzes import Quiz, Question, QuizAttempt, Answer
 from api.schemas.quizzes import (
     QuizCreate, QuizUpdate, QuizResponse,
     QuestionCreate, QuestionResponse,
     QuizSubmit, QuizAttemptResponse, QuizAttemptDetailResponse,
-    QuizGradeSubmit, AnswerResponse
+    QuizGradeSubmit, AnswerResponse, QuizWithQuestionsResponse
 )
 from api.dependencies import get_current_user, get_teacher_user
-from core.tts import generate_tts_audio
+from core.grading import grade_batch
+from core.ownership import course_owner_id
+from core.queue import enqueue_job
+from core.tts import generate_tts_audio_cached
+from cachetools import TTLCache
+from fastapi.responses import Response
+from pydantic import TypeAdapter
 
 router = APIRouter(prefix="/quizzes", tags=["Quizzes"])
 
+# Serialized payloads for the read-heavy student endpoints. Only published
+# quizzes are cached (their payload is role-independent), so a stale entry
+# can never leak an unpublished quiz; writes invalidate explicitly and the
+# short TTL bounds staleness across processes.
+_quiz_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_course_quizzes_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+
+def _invalidate_quiz_caches(quiz_id: int, course_id: int):
+    _quiz_cache.pop(quiz_id, None)
+    _course_quizzes_cache.pop(course_id, None)
+
+
+# Pre-built adapters reuse the compiled pydantic-core validator across
+# requests instead of re-validating item by item through response_model
+_quiz_list_adapter = TypeAdapter(List[QuizResponse])
+_question_list_adapter = TypeAdapter(List[QuestionResponse])
+_attempt_list_adapter = TypeAdapter(List[QuizAttemptResponse])
+_attempt_detail_list_adapter = TypeAdapter(List[QuizAttemptDetailResponse])
+
+
+async def _quiz_with_owner(db: AsyncSession, quiz_id: int):
+    """Fetch a quiz together with its course's teacher_id in one round-trip.
+
+    Raises 404 when the quiz does not exist; callers compare teacher_id
+    against the current user for the 403 decision.
+    """
+    row = (await db.execute(
+        select(Quiz, Course.teacher_id)
+        .join(Course, Course.id == Quiz.course_id)
+        .where(Quiz.id == quiz_id)
+    )).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz not found"
+        )
+    return row.Quiz, row.teacher_id
+
+
+def generate_quiz_tts_background(quiz_id: int, instructions: str, language: str = "en"):
+    """Background task to generate TTS audio for quiz instructions"""
+    db = SessionLocal()
+    try:
+        audio_url = generate_tts_audio_cached(instructions, language=language)
+
+        if audio_url:
+            db.execute(
+                update(Quiz)
+                .where(Quiz.id == quiz_id)
+                .values(instructions_audio_url=audio_url)
+            )
+            db.commit()
+            print(f"TTS audio generated successfully for quiz {quiz_id}")
+    except Exception as e:
+        print(f"Error generating TTS for quiz {quiz_id}: {e}")
+    finally:
+        db.close()
+
+
+def generate_question_tts_background(question_id: int, question_text: str, explanation: str, language: str = "en"):
+    """Background task to generate TTS audio for a question and its explanation"""
+    db = SessionLocal()
+    try:
+        values = {}
+        if question_text:
+            audio_url = generate_tts_audio_cached(question_text, language=language)
+            if audio_url:
+                values["question_audio_url"] = audio_url
+        if explanation:
+            audio_url = generate_tts_audio_cached(explanation, language=language)
+            if audio_url:
+                values["explanation_audio_url"] = audio_url
+
+        if values:
+            db.execute(
+                update(Question)
+                .where(Question.id == question_id)
+                .values(**values)
+            )
+            db.commit()
+            print(f"TTS audio generated successfully for question {question_id}")
+    except Exception as e:
+        print(f"Error generating TTS for question {question_id}: {e}")
+    finally:
+        db.close()
+
 
 @router.get("/course/{course_id}", response_model=List[QuizResponse])
-def get_course_quizzes(
+async def get_course_quizzes(
     course_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all quizzes for a course"""
-    query = db.query(Quiz).filter(Quiz.course_id == course_id)
-    
-    # Students can only see published quizzes
-    if current_user.role == UserRole.STUDENT:
-        query = query.filter(Quiz.is_published == True)
-    
-    quizzes = query.all()
+    # Students can only see published quizzes; that view is cacheable
+    student_view = current_user.role == UserRole.STUDENT
+
+    if student_view:
+        cached = _course_quizzes_cache.get(course_id)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+    query = select(Quiz).where(Quiz.course_id == course_id)
+    if student_view:
+        query = query.where(Quiz.is_published == True)
+
+    result = await db.execute(query)
+    quizzes = result.scalars().all()
+
+    if student_view:
+        payload = _quiz_list_adapter.dump_json(
+            [QuizResponse.model_validate(q) for q in quizzes]
+        ).decode()
+        _course_quizzes_cache[course_id] = payload
+        return Response(content=payload, media_type="application/json")
+
     return quizzes
 
 
 @router.get("/{quiz_id}", response_model=QuizResponse)
-def get_quiz(
+async def get_quiz(
     quiz_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get quiz by ID"""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+    cached = _quiz_cache.get(quiz_id)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    quiz = (await db.execute(
+        select(Quiz).where(Quiz.id == quiz_id)
+    )).scalar_one_or_none()
     if not quiz:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Quiz not found"
         )
-    
+
+    if quiz.is_published:
+        payload = QuizResponse.model_validate(quiz).model_dump_json()
+        _quiz_cache[quiz_id] = payload
+        return Response(content=payload, media_type="application/json")
+
+    return quiz
+
+
+@router.get("/{quiz_id}/full", response_model=QuizWithQuestionsResponse)
+async def get_quiz_full(
+    quiz_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a quiz together with its ordered questions in one response.
+
+    Replaces the header + questions request pair the quiz page used to
+    issue; the questions batch-load alongside the quiz instead of as a
+    separate endpoint round-trip.
+    """
+    quiz = (await db.execute(
+        select(Quiz)
+        .options(selectinload(Quiz.questions))
+        .where(Quiz.id == quiz_id)
+    )).scalar_one_or_none()
+    if not quiz:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz not found"
+        )
+
     return quiz
 
 
 @router.post("/", response_model=QuizResponse, status_code=status.HTTP_201_CREATED)
-def create_quiz(
+async def create_quiz(
     quiz_data: QuizCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new quiz (Teacher/Admin only)"""
-    # Verify course ownership
-    course = db.query(Course).filter(Course.id == quiz_data.course_id).first()
-    if not course:
+    # Verify course ownership (cached course_id -> teacher_id lookup)
+    teacher_id = await course_owner_id(db, quiz_data.course_id)
+    if teacher_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
-    
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+
+    if current_user.role == UserRole.TEACHER and teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to add quizzes to this course"
         )
-    
+
     new_quiz = Quiz(
         course_id=quiz_data.course_id,
         title=quiz_data.title,
@@ -87,108 +235,111 @@ def create_quiz(
         show_results_immediately=quiz_data.show_results_immediately,
         is_auto_graded=quiz_data.is_auto_graded
     )
-    
-    # Generate TTS for instructions
-    if quiz_data.instructions:
-        audio_url = generate_tts_audio(
-            quiz_data.instructions,
-            language="en",
-            filename=f"quiz_{new_quiz.id}_instructions.mp3"
-        )
-        new_quiz.instructions_audio_url = audio_url
-    
+
     db.add(new_quiz)
-    db.commit()
-    db.refresh(new_quiz)
-    
+    await db.commit()
+
+    _course_quizzes_cache.pop(quiz_data.course_id, None)
+
+    # Generate TTS for instructions off the request path; the audio URL
+    # shows up once synthesis finishes instead of blocking the 201
+    if quiz_data.instructions:
+        # Durable queue when configured, in-process background task otherwise
+        if not await enqueue_job("generate_quiz_tts", new_quiz.id, quiz_data.instructions):
+            background_tasks.add_task(
+                generate_quiz_tts_background,
+                new_quiz.id,
+                quiz_data.instructions
+            )
+
     return new_quiz
 
 
 @router.put("/{quiz_id}", response_model=QuizResponse)
-def update_quiz(
+async def update_quiz(
     quiz_id: int,
     quiz_data: QuizUpdate,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update quiz (Teacher/Admin only)"""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
-    if not quiz:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Quiz not found"
-        )
-    
+    quiz, teacher_id = await _quiz_with_owner(db, quiz_id)
+
     # Check ownership
-    course = db.query(Course).filter(Course.id == quiz.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+    if current_user.role == UserRole.TEACHER and teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to update this quiz"
         )
-    
+
     # Update fields
     update_data = quiz_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(quiz, field, value)
-    
-    db.commit()
-    db.refresh(quiz)
-    
+
+    await db.commit()
+
+    _invalidate_quiz_caches(quiz_id, quiz.course_id)
+
     return quiz
 
 
 @router.delete("/{quiz_id}")
-def delete_quiz(
+async def delete_quiz(
     quiz_id: int,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete quiz (Teacher/Admin only)"""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
-    if not quiz:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Quiz not found"
-        )
-    
-    # Check ownership
-    course = db.query(Course).filter(Course.id == quiz.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+    # Single DELETE with the ownership check folded into the WHERE clause;
+    # no row deleted means not-found or not-owned
+    stmt = delete(Quiz).where(Quiz.id == quiz_id)
+    if current_user.role == UserRole.TEACHER:
+        stmt = stmt.where(Quiz.course_id.in_(
+            select(Course.id).where(Course.teacher_id == current_user.id)
+        ))
+
+    course_id = (await db.execute(stmt.returning(Quiz.course_id))).scalar_one_or_none()
+    if course_id is None:
+        # Distinguish 404 from 403 with a cheap existence probe
+        exists = (await db.execute(
+            select(Quiz.id).where(Quiz.id == quiz_id)
+        )).scalar_one_or_none()
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Quiz not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to delete this quiz"
         )
-    
-    db.delete(quiz)
-    db.commit()
-    
+
+    await db.commit()
+
+    _invalidate_quiz_caches(quiz_id, course_id)
+
     return {"message": "Quiz deleted successfully"}
 
 
 @router.post("/{quiz_id}/questions", response_model=QuestionResponse, status_code=status.HTTP_201_CREATED)
-def add_question(
+async def add_question(
     quiz_id: int,
     question_data: QuestionCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a question to a quiz (Teacher/Admin only)"""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
-    if not quiz:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Quiz not found"
-        )
-    
+    quiz, teacher_id = await _quiz_with_owner(db, quiz_id)
+
     # Check ownership
-    course = db.query(Course).filter(Course.id == quiz.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+    if current_user.role == UserRole.TEACHER and teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to add questions to this quiz"
         )
-    
+
     new_question = Question(
         quiz_id=quiz_id,
         question_text=question_data.question_text,
@@ -199,58 +350,62 @@ def add_question(
         options=question_data.options,
         explanation=question_data.explanation
     )
-    
-    # Generate TTS for question
-    if question_data.question_text:
-        audio_url = generate_tts_audio(
-            question_data.question_text,
-            language="en",
-            filename=f"question_{new_question.id}.mp3"
-        )
-        new_question.question_audio_url = audio_url
-    
-    # Generate TTS for explanation
-    if question_data.explanation:
-        audio_url = generate_tts_audio(
-            question_data.explanation,
-            language="en",
-            filename=f"question_{new_question.id}_explanation.mp3"
-        )
-        new_question.explanation_audio_url = audio_url
-    
+
     db.add(new_question)
-    db.commit()
-    db.refresh(new_question)
-    
+    await db.commit()
+
+    # Generate TTS for the question text and explanation in the background
+    if question_data.question_text or question_data.explanation:
+        if not await enqueue_job(
+            "generate_question_tts",
+            new_question.id,
+            question_data.question_text,
+            question_data.explanation
+        ):
+            background_tasks.add_task(
+                generate_question_tts_background,
+                new_question.id,
+                question_data.question_text,
+                question_data.explanation
+            )
+
     return new_question
 
 
 @router.get("/{quiz_id}/questions", response_model=List[QuestionResponse])
-def get_quiz_questions(
+async def get_quiz_questions(
     quiz_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all questions for a quiz"""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+    quiz = (await db.execute(
+        select(Quiz).where(Quiz.id == quiz_id)
+    )).scalar_one_or_none()
     if not quiz:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Quiz not found"
         )
-    
-    questions = db.query(Question).filter(
-        Question.quiz_id == quiz_id
-    ).order_by(Question.order_index).all()
-    
-    return questions
+
+    result = await db.execute(
+        select(Question)
+        .where(Question.quiz_id == quiz_id)
+        .order_by(Question.order_index)
+    )
+    questions = result.scalars().all()
+
+    payload = _question_list_adapter.dump_json(
+        _question_list_adapter.validate_python(questions, from_attributes=True)
+    )
+    return Response(content=payload, media_type="application/json")
 
 
 @router.post("/{quiz_id}/start", response_model=QuizAttemptResponse)
-def start_quiz(
+async def start_quiz(
     quiz_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Start a quiz attempt (Student only)"""
     if current_user.role != UserRole.STUDENT:
@@ -258,26 +413,31 @@ def start_quiz(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students can take quizzes"
         )
-    
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
-    if not quiz or not quiz.is_published:
+
+    # Fetch the quiz and this student's attempt count in one round-trip;
+    # COUNT runs in the database instead of hydrating attempt rows
+    row = (await db.execute(
+        select(Quiz, func.count(QuizAttempt.id))
+        .outerjoin(QuizAttempt, and_(
+            QuizAttempt.quiz_id == Quiz.id,
+            QuizAttempt.student_id == current_user.id
+        ))
+        .where(Quiz.id == quiz_id)
+        .group_by(Quiz.id)
+    )).first()
+    if row is None or not row.Quiz.is_published:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Quiz not available"
         )
-    
-    # Check attempt limit
-    previous_attempts = db.query(QuizAttempt).filter(
-        QuizAttempt.quiz_id == quiz_id,
-        QuizAttempt.student_id == current_user.id
-    ).count()
-    
+    quiz, previous_attempts = row[0], row[1]
+
     # if quiz.max_attempts > 0 and previous_attempts >= quiz.max_attempts:
     #     raise HTTPException(
     #         status_code=status.HTTP_400_BAD_REQUEST,
     #         detail=f"Maximum attempts ({quiz.max_attempts}) reached"
     #     )
-    
+
     # Create new attempt
     attempt = QuizAttempt(
         quiz_id=quiz_id,
@@ -285,20 +445,19 @@ def start_quiz(
         attempt_number=previous_attempts + 1,
         max_score=quiz.max_score
     )
-    
+
     db.add(attempt)
-    db.commit()
-    db.refresh(attempt)
-    
+    await db.commit()
+
     return attempt
 
 
 @router.post("/{quiz_id}/submit", response_model=QuizAttemptResponse)
-def submit_quiz(
+async def submit_quiz(
     quiz_id: int,
     submission: QuizSubmit,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Submit quiz answers and get graded (Student only)"""
     if current_user.role != UserRole.STUDENT:
@@ -306,177 +465,197 @@ def submit_quiz(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students can submit quizzes"
         )
-    
+
     # Get active attempt
-    attempt = db.query(QuizAttempt).filter(
-        QuizAttempt.quiz_id == quiz_id,
-        QuizAttempt.student_id == current_user.id,
-        QuizAttempt.is_completed == False
-    ).order_by(QuizAttempt.id.desc()).first()
-    
+    attempt = (await db.execute(
+        select(QuizAttempt).where(
+            QuizAttempt.quiz_id == quiz_id,
+            QuizAttempt.student_id == current_user.id,
+            QuizAttempt.is_completed == False
+        ).order_by(QuizAttempt.id.desc()).limit(1)
+    )).scalar_one_or_none()
+
     if not attempt:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No active quiz attempt found"
         )
-    
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+
+    quiz = (await db.execute(
+        select(Quiz).where(Quiz.id == quiz_id)
+    )).scalar_one_or_none()
     total_score = 0.0
-    
-    # Process each answer
-    for answer_data in submission.answers:
-        question = db.query(Question).filter(
-            Question.id == answer_data.question_id
-        ).first()
-        
-        if not question:
-            continue
-        
-        # Create answer record
-        answer = Answer(
-            attempt_id=attempt.id,
-            question_id=answer_data.question_id,
-            answer_text=answer_data.answer_text
-        )
-        
-        # Only auto-grade if quiz is set to auto-graded (None defaults to True)
-        if quiz.is_auto_graded is not False:
-            is_correct = False
-            if question.question_type == QuestionType.MCQ:
-                if answer_data.answer_text and answer_data.answer_text.strip() == question.correct_answer:
-                    is_correct = True
-            elif question.question_type == QuestionType.TRUE_FALSE:
-                if answer_data.answer_text and answer_data.answer_text.lower() == question.correct_answer.lower():
-                    is_correct = True
-            elif question.question_type == QuestionType.SHORT_ANSWER:
-                # For short answer, check if answer contains keywords (simple matching)
-                if answer_data.answer_text and question.correct_answer:
-                    if question.correct_answer.lower() in answer_data.answer_text.lower():
-                        is_correct = True
-            
-            answer.is_correct = is_correct
-            answer.points_earned = question.points if is_correct else 0
-            total_score += answer.points_earned
-        else:
-            # Manual grading - no score yet
-            answer.is_correct = None
-            answer.points_earned = 0
-        
-        db.add(answer)
-    
-    # Update attempt with results (None defaults to True for auto-grading)
+
+    # Preload the quiz's questions in one round-trip instead of one
+    # SELECT per submitted answer
+    questions = {
+        q.id: q for q in (await db.execute(
+            select(Question).where(Question.quiz_id == quiz_id)
+        )).scalars()
+    }
+
+    # Pair each submitted answer with its question, dropping unknown ids
+    matched = [
+        (questions[a.question_id], a)
+        for a in submission.answers
+        if a.question_id in questions
+    ]
+
+    # Only auto-grade if quiz is set to auto-graded (None defaults to True)
     if quiz.is_auto_graded is not False:
-        # attempt.score = total_score
-        # attempt.percentage = (total_score / quiz.max_score * 100) if quiz.max_score > 0 else 0
-        # attempt.passed = attempt.percentage >= quiz.passing_score
-        # attempt.is_graded = True
-        attempt.score = total_score
-        attempt.max_score = len(submission.answers)
-        attempt.percentage = (attempt.score / attempt.max_score * 100) if attempt.max_score > 0 else 0
-        attempt.passed = attempt.percentage >= quiz.passing_score
-        attempt.is_graded = True
-        
+        grades = grade_batch((q, a.answer_text) for q, a in matched)
+    else:
+        # Manual grading - no score yet
+        grades = [(None, 0.0)] * len(matched)
+
+    answer_rows = []
+    for (question, answer_data), (is_correct, points_earned) in zip(matched, grades):
+        answer_rows.append({
+            "attempt_id": attempt.id,
+            "question_id": answer_data.question_id,
+            "answer_text": answer_data.answer_text,
+            "is_correct": is_correct,
+            "points_earned": points_earned
+        })
+        total_score += points_earned
+
+    # Compute the finalized attempt fields in Python, then write everything
+    # as one batched INSERT and one UPDATE in the same transaction
+    now = datetime.now()
+    if quiz.is_auto_graded is not False:
+        max_score = len(submission.answers)
+        percentage = (total_score / max_score * 100) if max_score > 0 else 0
+        attempt_updates = {
+            "score": total_score,
+            "max_score": max_score,
+            "percentage": percentage,
+            "passed": percentage >= quiz.passing_score,
+            "is_graded": True,
+        }
     else:
         # Manual grading - mark as submitted but not graded
-        attempt.score = 0
-        attempt.percentage = 0
-        attempt.passed = False
-        attempt.is_graded = False
-    
-    attempt.is_completed = True
-    attempt.time_submitted = datetime.now()
-    
-    # Calculate time taken
-    time_taken = (datetime.now() - attempt.time_started).total_seconds()
-    attempt.time_taken = int(time_taken)
-    
-    db.commit()
-    db.refresh(attempt)
-    
+        attempt_updates = {
+            "score": 0,
+            "percentage": 0,
+            "passed": False,
+            "is_graded": False,
+        }
+
+    attempt_updates.update(
+        is_completed=True,
+        time_submitted=now,
+        time_taken=int((now - attempt.time_started).total_seconds())
+    )
+
+    if answer_rows:
+        await db.execute(insert(Answer), answer_rows)
+    # ORM-enabled UPDATE: synchronize_session keeps the loaded attempt
+    # object current for the response
+    await db.execute(
+        update(QuizAttempt)
+        .where(QuizAttempt.id == attempt.id)
+        .values(**attempt_updates)
+    )
+    await db.commit()
+
     return attempt
 
 
 @router.get("/{quiz_id}/attempts", response_model=List[QuizAttemptResponse])
-def get_my_attempts(
+async def get_my_attempts(
     quiz_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get student's quiz attempts"""
-    attempts = db.query(QuizAttempt).filter(
-        QuizAttempt.quiz_id == quiz_id,
-        QuizAttempt.student_id == current_user.id
-    ).all()
-    
-    return attempts
+    result = await db.execute(
+        select(QuizAttempt).where(
+            QuizAttempt.quiz_id == quiz_id,
+            QuizAttempt.student_id == current_user.id
+        )
+    )
+    attempts = result.scalars().all()
+
+    payload = _attempt_list_adapter.dump_json(
+        _attempt_list_adapter.validate_python(attempts, from_attributes=True)
+    )
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get("/{quiz_id}/all-attempts", response_model=List[QuizAttemptResponse])
-def get_all_attempts(
+async def get_all_attempts(
     quiz_id: int,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all attempts for a quiz (Teacher/Admin only)"""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
-    if not quiz:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Quiz not found"
-        )
-    
+    quiz, teacher_id = await _quiz_with_owner(db, quiz_id)
+
     # Check ownership
-    course = db.query(Course).filter(Course.id == quiz.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+    if current_user.role == UserRole.TEACHER and teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to view attempts for this quiz"
         )
-    
-    attempts = db.query(QuizAttempt).filter(QuizAttempt.quiz_id == quiz_id).all()
-    return attempts
+
+    result = await db.execute(
+        select(QuizAttempt).where(QuizAttempt.quiz_id == quiz_id)
+    )
+    attempts = result.scalars().all()
+
+    payload = _attempt_list_adapter.dump_json(
+        _attempt_list_adapter.validate_python(attempts, from_attributes=True)
+    )
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get("/{quiz_id}/all-attempts-detail", response_model=List[QuizAttemptDetailResponse])
-def get_all_attempts_detail(
+async def get_all_attempts_detail(
     quiz_id: int,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all attempts with answers for a quiz (Teacher/Admin only) - for grading"""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
-    if not quiz:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Quiz not found"
-        )
-    
+    quiz, teacher_id = await _quiz_with_owner(db, quiz_id)
+
     # Check ownership
-    course = db.query(Course).filter(Course.id == quiz.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+    if current_user.role == UserRole.TEACHER and teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to view attempts for this quiz"
         )
-    
-    attempts = db.query(QuizAttempt).filter(QuizAttempt.quiz_id == quiz_id).all()
-    return attempts
+
+    result = await db.execute(
+        select(QuizAttempt)
+        .options(selectinload(QuizAttempt.answers), selectinload(QuizAttempt.student))
+        .where(QuizAttempt.quiz_id == quiz_id)
+    )
+    attempts = result.scalars().all()
+
+    payload = _attempt_detail_list_adapter.dump_json(
+        _attempt_detail_list_adapter.validate_python(attempts, from_attributes=True)
+    )
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get("/attempts/{attempt_id}", response_model=QuizAttemptDetailResponse)
-def get_attempt_detail(
+async def get_attempt_detail(
     attempt_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get detailed attempt with answers (Student can view own, Teacher can view all in their courses)"""
-    attempt = db.query(QuizAttempt).filter(QuizAttempt.id == attempt_id).first()
+    attempt = (await db.execute(
+        select(QuizAttempt)
+        .options(selectinload(QuizAttempt.answers), selectinload(QuizAttempt.student))
+        .where(QuizAttempt.id == attempt_id)
+    )).scalar_one_or_none()
     if not attempt:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Attempt not found"
         )
-    
+
     # Students can only view their own attempts
     if current_user.role == UserRole.STUDENT:
         if attempt.student_id != current_user.id:
@@ -485,72 +664,90 @@ def get_attempt_detail(
                 detail="You can only view your own attempts"
             )
     elif current_user.role == UserRole.TEACHER:
-        # Teachers can only view attempts for quizzes in their courses
-        quiz = db.query(Quiz).filter(Quiz.id == attempt.quiz_id).first()
-        course = db.query(Course).filter(Course.id == quiz.course_id).first()
-        if course.teacher_id != current_user.id:
+        # Teachers can only view attempts for quizzes in their courses;
+        # only the owning teacher's id is needed, not the quiz or course rows
+        teacher_id = (await db.execute(
+            select(Course.teacher_id)
+            .join(Quiz, Quiz.course_id == Course.id)
+            .where(Quiz.id == attempt.quiz_id)
+        )).scalar_one_or_none()
+        if teacher_id != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You can only view attempts for your courses"
             )
-    
+
     return attempt
 
 
 @router.post("/attempts/{attempt_id}/grade")
-def grade_attempt(
+async def grade_attempt(
     attempt_id: int,
     grade_data: QuizGradeSubmit,
     current_user: User = Depends(get_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Grade a quiz attempt (Teacher/Admin only)"""
-    attempt = db.query(QuizAttempt).filter(QuizAttempt.id == attempt_id).first()
-    if not attempt:
+    # One SELECT fetches the attempt, its quiz and the owning teacher_id
+    row = (await db.execute(
+        select(QuizAttempt, Quiz, Course.teacher_id)
+        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
+        .join(Course, Course.id == Quiz.course_id)
+        .where(QuizAttempt.id == attempt_id)
+    )).first()
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Attempt not found"
         )
-    
+    attempt, quiz, teacher_id = row.QuizAttempt, row.Quiz, row.teacher_id
+
     # Check ownership
-    quiz = db.query(Quiz).filter(Quiz.id == attempt.quiz_id).first()
-    course = db.query(Course).filter(Course.id == quiz.course_id).first()
-    if current_user.role == UserRole.TEACHER and course.teacher_id != current_user.id:
+    if current_user.role == UserRole.TEACHER and teacher_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to grade this quiz"
         )
-    
+
+    # Validate all answer ids against the attempt in one query, then grade
+    # with a single executemany UPDATE instead of SELECT+UPDATE per answer
+    valid_ids = set((await db.execute(
+        select(Answer.id).where(Answer.attempt_id == attempt_id)
+    )).scalars())
+
+    graded_at = datetime.now()
     total_score = 0.0
-    
-    # Grade each answer
+    mappings = []
     for grade in grade_data.answers:
-        answer = db.query(Answer).filter(Answer.id == grade.answer_id).first()
-        if not answer or answer.attempt_id != attempt_id:
+        if grade.answer_id not in valid_ids:
             continue
-        
-        answer.is_correct = grade.is_correct
-        answer.points_earned = grade.points_earned
-        answer.teacher_feedback = grade.feedback
-        answer.graded_at = datetime.now()
+        mappings.append({
+            "id": grade.answer_id,
+            "is_correct": grade.is_correct,
+            "points_earned": grade.points_earned,
+            "teacher_feedback": grade.feedback,
+            "graded_at": graded_at,
+        })
         total_score += grade.points_earned
-    
+
+    if mappings:
+        await db.execute(update(Answer), mappings)
+
     # Update attempt
     attempt.score = total_score
     attempt.percentage = (total_score / quiz.max_score * 100) if quiz.max_score > 0 else 0
     attempt.passed = attempt.percentage >= quiz.passing_score
     attempt.is_graded = True
-    
-    db.commit()
-    db.refresh(attempt)
-    
+
+    await db.commit()
+
     return {"message": "Attempt graded successfully", "score": attempt.score, "percentage": attempt.percentage, "passed": attempt.passed}
 
 
 @router.get("/my-attempts/all", response_model=List[QuizAttemptDetailResponse])
-def get_all_my_attempts(
+async def get_all_my_attempts(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all quiz attempts for the current student"""
     if current_user.role != UserRole.STUDENT:
@@ -558,10 +755,18 @@ def get_all_my_attempts(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students can view their attempts"
         )
-    
-    attempts = db.query(QuizAttempt).filter(
-        QuizAttempt.student_id == current_user.id,
-        QuizAttempt.is_completed == True
-    ).order_by(QuizAttempt.time_submitted.desc()).all()
-    
-    return attempts
+
+    result = await db.execute(
+        select(QuizAttempt)
+        .options(selectinload(QuizAttempt.answers), selectinload(QuizAttempt.student))
+        .where(
+            QuizAttempt.student_id == current_user.id,
+            QuizAttempt.is_completed == True
+        ).order_by(QuizAttempt.time_submitted.desc())
+    )
+    attempts = result.scalars().all()
+
+    payload = _attempt_detail_list_adapter.dump_json(
+        _attempt_detail_list_adapter.validate_python(attempts, from_attributes=True)
+    )
+    return Response(content=payload, media_type="application/json")
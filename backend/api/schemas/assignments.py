@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
 from datetime import datetime
 from db.assignments import AssignmentType, SubmissionStatus
 
@@ -35,17 +35,10 @@ class AssignmentResponse(AssignmentBase):
     is_published: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
-
-
-class SubmissionCreate(BaseModel):
-    assignment_id: int
-    text_answer: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SubmissionUpdate(BaseModel):
-    assignment_id: int
     text_answer: Optional[str] = None
     voice_answer_url: Optional[str] = None
     attachment_url: Optional[str] = None
@@ -56,6 +49,14 @@ class SubmissionGrade(BaseModel):
     feedback_text: Optional[str] = None
 
 
+class SubmissionGradeItem(SubmissionGrade):
+    submission_id: int
+
+
+class BulkGrade(BaseModel):
+    items: List[SubmissionGradeItem]
+
+
 class SubmissionResponse(BaseModel):
     id: int
     assignment_id: int
@@ -69,5 +70,4 @@ class SubmissionResponse(BaseModel):
     submitted_at: datetime
     graded_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
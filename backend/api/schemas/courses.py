@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
 
@@ -31,8 +31,7 @@ class CourseResponse(CourseBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class EnrollmentResponse(BaseModel):
@@ -45,5 +44,4 @@ class EnrollmentResponse(BaseModel):
     enrolled_at: datetime
     course: CourseResponse
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
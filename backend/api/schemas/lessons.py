@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, computed_field, model_validator
 from typing import Optional
 from datetime import datetime
 from db.lessons import ContentType
@@ -33,13 +33,49 @@ class LessonResponse(LessonBase):
     audio_url: Optional[str] = None
     tts_status: Optional[str] = "none"  # none, processing, ready, error
     duration: Optional[int] = None
-    duration_minutes: Optional[int] = None
     is_published: bool
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def duration_minutes(self) -> int:
+        return self.duration // 60 if self.duration else 10
+
+    @model_validator(mode="before")
+    @classmethod
+    def _audio_fields(cls, value):
+        # Validating straight from a Lesson row: derive audio_url/tts_status
+        # from the eager-loaded audio relationship in the same pass
+        audio = getattr(value, "audio", None)
+        if audio is None:
+            return value
+
+        if audio.processing_error:
+            tts_status = "error"
+        elif audio.is_processed and audio.audio_url:
+            tts_status = "ready"
+        else:
+            tts_status = "processing"
+
+        return {
+            "id": value.id,
+            "course_id": value.course_id,
+            "title": value.title,
+            "description": value.description,
+            "content_text": value.content_text,
+            "content_type": value.content_type,
+            "order_index": value.order_index,
+            "file_url": value.file_url,
+            "audio_url": audio.audio_url if audio.is_processed else None,
+            "tts_status": tts_status,
+            "duration": value.duration,
+            "is_published": value.is_published,
+            "created_at": value.created_at,
+            "updated_at": value.updated_at
+        }
 
 
 class LessonProgressResponse(BaseModel):
@@ -59,8 +95,7 @@ class LessonProgressResponse(BaseModel):
     def completed(self) -> bool:
         return self.is_completed
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class LessonProgressUpdate(BaseModel):
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
 from db.quizzes import QuestionType
@@ -23,8 +23,7 @@ class QuestionResponse(QuestionCreate):
     explanation_audio_url: Optional[str] = None
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class QuizBase(BaseModel):
@@ -66,8 +65,14 @@ class QuizResponse(QuizBase):
     is_auto_graded: Optional[bool] = True
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class QuizWithQuestionsResponse(QuizResponse):
+    """Quiz header plus its ordered questions in one payload"""
+    questions: list[QuestionResponse] = []
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class AnswerSubmit(BaseModel):
@@ -90,8 +95,7 @@ class AnswerResponse(BaseModel):
     answered_at: datetime
     graded_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class AnswerGrade(BaseModel):
@@ -110,8 +114,7 @@ class StudentInfo(BaseModel):
     full_name: str
     email: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class QuizAttemptResponse(BaseModel):
@@ -129,8 +132,7 @@ class QuizAttemptResponse(BaseModel):
     is_completed: bool
     is_graded: bool
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class QuizAttemptDetailResponse(QuizAttemptResponse):
@@ -138,5 +140,4 @@ class QuizAttemptDetailResponse(QuizAttemptResponse):
     student: Optional[StudentInfo] = None
     answers: list[AnswerResponse] = []
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
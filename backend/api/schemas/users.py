@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import Optional
 from datetime import datetime
 from db.users import UserRole
@@ -12,6 +12,10 @@ class UserBase(BaseModel):
     voice_speed: int = 1
     preferred_language: str = "en"
 
+    # Store the raw role string at validation time so every response
+    # serializes it without the enum-wrapper hop
+    model_config = ConfigDict(use_enum_values=True)
+
 
 class UserCreate(UserBase):
     password: str
@@ -33,8 +37,7 @@ class UserResponse(UserBase):
     created_at: datetime
     last_login: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PasswordChange(BaseModel):
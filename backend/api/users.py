@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select, insert, exists
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from db.session import get_db
+from db.session import get_db, get_async_db
 from db.users import User, UserRole
 from api.schemas.users import UserResponse, UserUpdate, UserCreate
 from api.dependencies import get_current_user, get_admin_user
@@ -9,28 +16,84 @@ from core.security import hash_password
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+# Non-critical fields a user may change on their own profile
+_ALLOWED_SELF_FIELDS = frozenset({"full_name", "is_blind", "voice_speed", "preferred_language"})
+
+# Built once: reuses the compiled pydantic-core serializer and skips
+# FastAPI's response_model re-validation pass
+_user_list_adapter = TypeAdapter(List[UserResponse])
+
 
 @router.get("/", response_model=List[UserResponse])
-def get_all_users(
-    skip: int = 0,
+async def get_all_users(
+    cursor_id: Optional[int] = Query(None),
     limit: int = 100,
     role: Optional[UserRole] = None,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all users (Admin only)"""
-    query = db.query(User)
-    
+    """Get all users (Admin only). Pass the last row's id as `cursor_id` to page."""
+    # Select only the response columns: password_hash and the token fields
+    # never cross the wire from the database, and the rows skip ORM
+    # instrumentation entirely
+    query = select(
+        User.id, User.email, User.full_name, User.role,
+        User.is_blind, User.voice_speed, User.preferred_language,
+        User.is_active, User.is_verified, User.created_at, User.last_login
+    )
+
     if role:
-        query = query.filter(User.role == role)
-    
-    users = query.offset(skip).limit(limit).all()
-    return users
+        query = query.where(User.role == role)
+
+    # Keyset pagination: O(limit) index range scan at any page depth,
+    # unlike OFFSET which scans and discards the skipped rows
+    if cursor_id is not None:
+        query = query.where(User.id > cursor_id)
+
+    result = await db.execute(query.order_by(User.id).limit(limit))
+    # The database already enforces these types; model_construct skips
+    # the per-field validation pass
+    users = [UserResponse.model_construct(**row) for row in result.mappings()]
+    return Response(
+        content=_user_list_adapter.dump_json(users),
+        media_type="application/json"
+    )
+
+
+@router.get("/export")
+async def export_users(
+    role: Optional[UserRole] = None,
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export all users as NDJSON (Admin only).
+
+    Streams one JSON line per user with server-side cursoring, so memory
+    stays at one batch no matter how large the user table grows.
+    """
+    query = select(
+        User.id, User.email, User.full_name, User.role,
+        User.is_blind, User.voice_speed, User.preferred_language,
+        User.is_active, User.is_verified, User.created_at, User.last_login
+    )
+    if role:
+        query = query.where(User.role == role)
+
+    async def user_lines():
+        result = await db.stream(
+            query.order_by(User.id).execution_options(yield_per=200)
+        )
+        async for row in result.mappings():
+            yield UserResponse.model_construct(**row).model_dump_json() + "\n"
+
+    return StreamingResponse(user_lines(), media_type="application/x-ndjson")
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(
     user_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -41,38 +104,58 @@ def get_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+
+    # Weak ETag from the row version: polling dashboards get a 304 and
+    # skip serialization (and the transfer) when nothing changed
+    etag = f'W/"{user_id}-{int(user.updated_at.timestamp())}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+
+    response.headers["ETag"] = etag
     return user
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     user_data: UserCreate,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new user (Admin only)"""
-    # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
+    # The duplicate-email probe and the Argon2 hash are independent, and the
+    # hash dominates wall-clock; overlap them so the request costs
+    # max(hash, query) instead of their sum. The hash is wasted work when
+    # the email is taken, but that is the rare failure path.
+    email_taken, password_hash = await asyncio.gather(
+        # Scalar EXISTS against the unique email index, no row hydration
+        db.scalar(select(exists().where(User.email == user_data.email))),
+        # Argon2 takes tens of milliseconds by design; keep it off the loop
+        run_in_threadpool(hash_password, user_data.password),
+    )
+    if email_taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    
-    new_user = User(
-        email=user_data.email,
-        password_hash=hash_password(user_data.password),
-        full_name=user_data.full_name,
-        role=user_data.role,
-        is_blind=user_data.is_blind,
-        voice_speed=user_data.voice_speed,
-        preferred_language=user_data.preferred_language
+
+    # INSERT ... RETURNING fetches the generated id and timestamps in the
+    # same round-trip; no post-commit refresh SELECT
+    result = await db.execute(
+        insert(User)
+        .values(
+            email=user_data.email,
+            password_hash=password_hash,
+            full_name=user_data.full_name,
+            role=user_data.role,
+            is_blind=user_data.is_blind,
+            voice_speed=user_data.voice_speed,
+            preferred_language=user_data.preferred_language
+        )
+        .returning(User)
     )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
+    new_user = result.scalar_one()
+    await db.commit()
+
     return new_user
 
 
@@ -91,14 +174,13 @@ def update_user(
             detail="User not found"
         )
     
-    # Update fields
-    update_data = user_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(user, field, value)
-    
+    # Update only the fields the request actually sent, straight off the
+    # pydantic instance - no model_dump dict in between
+    for field in user_data.model_fields_set:
+        setattr(user, field, getattr(user_data, field))
+
     db.commit()
-    db.refresh(user)
-    
+
     return user
 
 
@@ -135,15 +217,14 @@ def update_own_profile(
     db: Session = Depends(get_db)
 ):
     """Update own profile"""
-    # Users can only update their own non-critical fields
-    allowed_fields = {"full_name", "is_blind", "voice_speed", "preferred_language"}
-    update_data = user_data.model_dump(exclude_unset=True)
-    
-    for field, value in update_data.items():
-        if field in allowed_fields:
-            setattr(current_user, field, value)
-    
+    # Re-fetch in this session: current_user belongs to the auth dependency's session
+    user = db.query(User).filter(User.id == current_user.id).first()
+
+    # Users can only update their own non-critical fields; iterate the
+    # fields actually sent instead of materializing a model_dump dict
+    for field in user_data.model_fields_set & _ALLOWED_SELF_FIELDS:
+        setattr(user, field, getattr(user_data, field))
+
     db.commit()
-    db.refresh(current_user)
-    
-    return current_user
+
+    return user
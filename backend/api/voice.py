@@ -7,12 +7,19 @@ import os
 import json
 import base64
 import asyncio
+import hashlib
+import time
 from datetime import datetime
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
-from sqlalchemy.orm import Session
-from jose import jwt, JWTError
-from db.session import get_db
-from db import courses, lessons, users, quizzes, assignments
+import orjson
+from cachetools import TTLCache
+from dataclasses import dataclass, field
+from typing import Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+import jwt
+from db.session import AsyncSessionLocal
+from db import courses, lessons, quizzes, assignments
 from db.users import User
 from db.models import QuizAttempt, Submission, LessonProgress
 from db.quizzes import Answer
@@ -25,20 +32,37 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_REALTIME_URL = "wss://api.openai.com/v1/realtime?model=gpt-realtime-mini"
 
 
-def get_user_from_token(token: str, db: Session) -> User:
+# Verified-token cache: a long-lived realtime socket presents the same bearer
+# token on every reconnect, so skip the HMAC verification once it has passed.
+# Keyed by a token digest (never the raw token) and holds only (user_id, exp),
+# not ORM objects; the short TTL keeps token expiry honest. Failed
+# verifications are never cached.
+_token_cache: TTLCache = TTLCache(maxsize=10000, ttl=30)
+
+
+async def get_user_from_token(token: str, db: AsyncSession) -> User:
     """Verify token and return user"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("user_id")
-        if user_id is None:
+    key = hashlib.sha256(token.encode()).digest()
+
+    cached = _token_cache.get(key)
+    if cached is not None and (cached[1] is None or cached[1] > time.time()):
+        user_id = cached[0]
+    else:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id = payload.get("user_id")
+            if user_id is None:
+                return None
+        except jwt.PyJWTError:
             return None
-    except JWTError:
-        return None
-    
-    user = db.query(User).filter(User.id == user_id).first()
+        _token_cache[key] = (user_id, payload.get("exp"))
+
+    # Always re-fetch the row: the cache skips the crypto, not the
+    # is_active check
+    user = await db.get(User, user_id)
     if user is None or not user.is_active:
         return None
-    
+
     return user
 
 
@@ -49,15 +73,41 @@ def parse_options(options):
     if isinstance(options, list):
         return options
     try:
-        parsed = json.loads(options)
+        parsed = orjson.loads(options)
         return parsed if isinstance(parsed, list) else []
     except:
+        # Fallback for single-quoted pseudo-JSON; orjson is strict, so the
+        # lenient stdlib parser stays on this cold path only
         try:
             return json.loads(options.replace("'", '"'))
         except:
             return []
 
 
+async def send_json_fast(ws: WebSocket, obj) -> None:
+    """websocket.send_json via orjson.
+
+    The browser client does JSON.parse on text frames, so the bytes are
+    decoded rather than sent as a binary frame.
+    """
+    await ws.send_text(orjson.dumps(obj).decode())
+
+
+def orjson_dumps_text(obj) -> str:
+    """orjson.dumps decoded to str, for text-frame sends to OpenAI Realtime"""
+    return orjson.dumps(obj).decode()
+
+
+# Constant envelope for context_update frames; per call only the payload
+# gets encoded
+_CONTEXT_PREFIX = b'{"type":"context_update","data":'
+
+
+def _short(s: Optional[str], n: int = 100) -> Optional[str]:
+    """Truncate long text for voice-friendly listings"""
+    return s if s is None or len(s) <= n else f"{s[:n]}..."
+
+
 # Enhanced tools for the voice assistant
 VOICE_TOOLS = [
     # Course Navigation
@@ -364,6 +414,19 @@ VOICE_TOOLS = [
     }
 ]
 
+# The tools schema is fixed at import; serialize it once so each WebSocket
+# handshake splices a pre-encoded blob instead of re-encoding the whole
+# nested list per connection
+_VOICE_TOOLS_JSON: bytes = orjson.dumps(VOICE_TOOLS)
+
+
+def _session_update_text(session_fields: dict) -> str:
+    """Build the session.update frame, splicing in the pre-encoded tools"""
+    raw = orjson.dumps({"type": "session.update", "session": session_fields})
+    # raw ends with the two braces closing "session" and the frame
+    return (raw[:-2] + b',"tools":' + _VOICE_TOOLS_JSON + b"}}").decode()
+
+
 SYSTEM_INSTRUCTIONS = """You are a helpful voice assistant for the E4A Learning Platform, specifically designed to help visually impaired students navigate and interact with educational content through voice commands.
 
 ## Your Capabilities:
@@ -406,43 +469,67 @@ SYSTEM_INSTRUCTIONS = """You are a helpful voice assistant for the E4A Learning
 Current student information will be provided with each session."""
 
 
+@dataclass(slots=True)
+class VoiceSession:
+    """Per-user voice assistant state.
+
+    Slotted: a session takes hundreds of attribute reads per tool call,
+    and slots keep those off dict lookups while shrinking the per-user
+    footprint.
+    """
+    mode: str = "idle"  # idle, quiz, lesson, assignment
+    # Course context
+    current_course_id: Optional[int] = None
+    courses_cache: list = field(default_factory=list)
+    available_courses_cache: list = field(default_factory=list)
+    # Lesson context
+    current_lesson_id: Optional[int] = None
+    lessons_cache: list = field(default_factory=list)
+    # Quiz context
+    current_quiz_id: Optional[int] = None
+    quiz_questions: list = field(default_factory=list)
+    current_question_index: int = 0
+    quiz_answers: dict = field(default_factory=dict)
+    pending_answer: Optional[int] = None
+    quizzes_cache: list = field(default_factory=list)
+    # Assignment context
+    current_assignment_id: Optional[int] = None
+    assignment_content: str = ""
+    assignments_cache: list = field(default_factory=list)
+    # Companion indexes over the caches above, rebuilt whenever a cache is
+    # filled: number->id for O(1) spoken-number lookups, plus titles
+    # lowercased once for substring matching
+    courses_by_number: dict = field(default_factory=dict)
+    courses_title_lower: list = field(default_factory=list)
+    available_courses_by_number: dict = field(default_factory=dict)
+    lessons_by_number: dict = field(default_factory=dict)
+    quizzes_by_number: dict = field(default_factory=dict)
+    quizzes_title_lower: list = field(default_factory=list)
+    assignments_by_number: dict = field(default_factory=dict)
+    # course_id -> (lessons, quizzes, assignments): a student drilling into
+    # the same course repeats these three queries many times per session
+    course_detail_cache: dict = field(default_factory=dict)
+
+
 class VoiceSessionManager:
     """Manages voice session state for each connected user"""
-    
+
     def __init__(self):
-        self.sessions = {}
-    
-    def create_session(self, user_id: int):
-        self.sessions[user_id] = {
-            "mode": "idle",  # idle, quiz, lesson, assignment
-            # Course context
-            "current_course_id": None,
-            "courses_cache": [],
-            "available_courses_cache": [],
-            # Lesson context
-            "current_lesson_id": None,
-            "lessons_cache": [],
-            # Quiz context
-            "current_quiz_id": None,
-            "quiz_questions": [],
-            "current_question_index": 0,
-            "quiz_answers": {},
-            "pending_answer": None,
-            "quizzes_cache": [],
-            # Assignment context
-            "current_assignment_id": None,
-            "assignment_content": "",
-            "assignments_cache": []
-        }
+        self.sessions: dict[int, VoiceSession] = {}
+
+    def create_session(self, user_id: int) -> VoiceSession:
+        self.sessions[user_id] = VoiceSession()
         return self.sessions[user_id]
-    
-    def get_session(self, user_id: int):
+
+    def get_session(self, user_id: int) -> Optional[VoiceSession]:
         return self.sessions.get(user_id)
-    
+
     def update_session(self, user_id: int, **kwargs):
-        if user_id in self.sessions:
-            self.sessions[user_id].update(kwargs)
-    
+        session = self.sessions.get(user_id)
+        if session is not None:
+            for key, value in kwargs.items():
+                setattr(session, key, value)
+
     def remove_session(self, user_id: int):
         if user_id in self.sessions:
             del self.sessions[user_id]
@@ -451,11 +538,21 @@ class VoiceSessionManager:
 session_manager = VoiceSessionManager()
 
 
+def _index_by_number(items):
+    """number -> id lookup for a freshly filled list cache"""
+    return {item["number"]: item["id"] for item in items}
+
+
+def _index_titles(items):
+    """(lowercased title, id) pairs, lowered once at cache-fill time"""
+    return [(item["title"].lower(), item["id"]) for item in items]
+
+
 async def execute_function(
     function_name: str, 
     arguments: dict, 
     user_id: int, 
-    db: Session,
+    db: AsyncSession,
     websocket: WebSocket = None
 ) -> dict:
     """Execute a function call and return the result"""
@@ -466,17 +563,18 @@ async def execute_function(
         """Send context update to client"""
         if websocket:
             try:
-                await websocket.send_json({
-                    "type": "context_update",
-                    "data": data
-                })
+                # Splice the payload into the pre-encoded envelope; decoded
+                # because the browser JSON.parses text frames
+                await websocket.send_text(
+                    (_CONTEXT_PREFIX + orjson.dumps(data) + b"}").decode()
+                )
             except:
                 pass
     
     # ==================== COURSE FUNCTIONS ====================
     
     if function_name == "list_enrolled_courses":
-        enrollments = courses.get_user_enrollments(db, user_id)
+        enrollments = await courses.get_user_enrollments(db, user_id)
         course_list = []
         for i, enrollment in enumerate(enrollments, 1):
             course = enrollment.course
@@ -484,11 +582,16 @@ async def execute_function(
                 "number": i,
                 "id": course.id,
                 "title": course.title,
-                "description": course.description[:100] + "..." if len(course.description or "") > 100 else course.description,
+                "description": _short(course.description),
                 "progress": enrollment.progress_percentage
             })
         
-        session_manager.update_session(user_id, courses_cache=course_list)
+        session_manager.update_session(
+            user_id,
+            courses_cache=course_list,
+            courses_by_number=_index_by_number(course_list),
+            courses_title_lower=_index_titles(course_list),
+        )
         
         await send_context_update({
             "action": "show_courses",
@@ -514,14 +617,14 @@ async def execute_function(
         if not name_substr:
             return {"success": False, "message": "Please provide a course name or substring to search for."}
         
-        matched_courses = courses.get_courses_by_name(db, name_substr)
+        matched_courses = await courses.get_courses_by_name(db, name_substr)
         course_list = []
         for i, course in enumerate(matched_courses, 1):
             course_list.append({
                 "number": i,
                 "id": course.id,
                 "title": course.title,
-                "description": course.description[:100] + "..." if len(course.description or "") > 100 else course.description
+                "description": _short(course.description)
             })
         
         if not course_list:
@@ -535,8 +638,8 @@ async def execute_function(
         }
     
     elif function_name == "list_available_courses":
-        all_courses = courses.get_courses(db, published_only=True)
-        enrollments = courses.get_user_enrollments(db, user_id)
+        all_courses = await courses.get_courses(db, published_only=True)
+        enrollments = await courses.get_user_enrollments(db, user_id)
         enrolled_ids = {e.course_id for e in enrollments}
         
         available = []
@@ -546,10 +649,14 @@ async def execute_function(
                     "number": len(available) + 1,
                     "id": course.id,
                     "title": course.title,
-                    "description": course.description[:100] + "..." if len(course.description or "") > 100 else course.description
+                    "description": _short(course.description)
                 })
         
-        session_manager.update_session(user_id, available_courses_cache=available)
+        session_manager.update_session(
+            user_id,
+            available_courses_cache=available,
+            available_courses_by_number=_index_by_number(available),
+        )
         
         await send_context_update({
             "action": "show_courses",
@@ -573,15 +680,11 @@ async def execute_function(
         course_name = arguments.get("course_name")
         
         # Find course by various methods
-        available_cache = session.get("available_courses_cache", [])
-        if course_number and available_cache:
-            for c in available_cache:
-                if c["number"] == course_number:
-                    course_id = c["id"]
-                    break
+        if course_number:
+            course_id = session.available_courses_by_number.get(course_number, course_id)
         
         if not course_id and course_name:
-            available_course = courses.get_courses_by_name(db, course_name)
+            available_course = await courses.get_courses_by_name(db, course_name)
             if available_course:
                 course_id = available_course[0].id
             
@@ -591,14 +694,15 @@ async def execute_function(
             return {"success": False, "message": "Course not found. Please say the course number or name from the available courses list."}
         
         # Check if already enrolled
-        existing = courses.get_enrollment(db, user_id, course_id)
+        existing = await courses.get_enrollment(db, user_id, course_id)
         if existing:
             return {"success": False, "message": "You are already enrolled in this course."}
         
         # Enroll
         try:
-            enrollment = courses.create_enrollment(db, user_id, course_id)
-            course = courses.get_course(db, course_id)
+            enrollment = await courses.create_enrollment(db, user_id, course_id)
+            session.course_detail_cache.clear()
+            course = await courses.get_course(db, course_id)
             
             await send_context_update({
                 "action": "enrollment_complete",
@@ -618,34 +722,45 @@ async def execute_function(
         course_name = arguments.get("course_name")
         
         # Find course
-        courses_cache = session.get("courses_cache", [])
-        if course_number and courses_cache:
-            for c in courses_cache:
-                if c["number"] == course_number:
-                    course_id = c["id"]
-                    break
+        if course_number:
+            course_id = session.courses_by_number.get(course_number, course_id)
         
         if not course_id and course_name:
-            for c in courses_cache:
-                if course_name.lower() in c["title"].lower():
-                    course_id = c["id"]
-                    break
-        
-        print(courses_cache)
-        
+            name_low = course_name.lower()
+            course_id = next(
+                (cid for title_low, cid in session.courses_title_lower if name_low in title_low),
+                None
+            )
+
+
         if not course_id:
             return {"success": False, "message": "Course not found. Please specify the course number or name."}
         
-        course = courses.get_course(db, course_id)
+        course = await courses.get_course(db, course_id)
         if not course:
             return {"success": False, "message": "Course not found."}
         
-        course_lessons = lessons.get_lessons_by_course(db, course_id)
-        course_quizzes = quizzes.get_quizzes_by_course(db, course_id)
-        course_assignments = assignments.get_assignments_by_course(db, course_id)
+        # One AsyncSession cannot run statements concurrently, so the three
+        # queries stay sequential; the per-session cache makes every repeat
+        # visit to the same course free instead
+        cached_detail = session.course_detail_cache.get(course_id)
+        if cached_detail is not None:
+            course_lessons, course_quizzes, course_assignments = cached_detail
+        else:
+            course_lessons = await lessons.get_lessons_by_course(db, course_id)
+            course_quizzes = await quizzes.get_quizzes_by_course(db, course_id)
+            course_assignments = await assignments.get_assignments_by_course(db, course_id)
+            session.course_detail_cache[course_id] = (
+                course_lessons, course_quizzes, course_assignments
+            )
         
         lessons_cache = [{"number": i+1, "id": l.id, "title": l.title} for i, l in enumerate(course_lessons)]
-        session_manager.update_session(user_id, current_course_id=course_id, lessons_cache=lessons_cache)
+        session_manager.update_session(
+            user_id,
+            current_course_id=course_id,
+            lessons_cache=lessons_cache,
+            lessons_by_number=_index_by_number(lessons_cache),
+        )
         
         return {
             "success": True,
@@ -659,16 +774,21 @@ async def execute_function(
     # ==================== LESSON FUNCTIONS ====================
     
     elif function_name == "list_course_lessons":
-        course_id = arguments.get("course_id") or session.get("current_course_id")
+        course_id = arguments.get("course_id") or session.current_course_id
         
         if not course_id:
             return {"success": False, "message": "Please select a course first, or say 'show my courses'."}
         
-        course_lessons = lessons.get_lessons_by_course(db, course_id)
+        course_lessons = await lessons.get_lessons_by_course(db, course_id)
         lesson_list = [{"number": i+1, "id": l.id, "title": l.title, "duration": l.duration_minutes} 
                       for i, l in enumerate(course_lessons)]
         
-        session_manager.update_session(user_id, lessons_cache=lesson_list, current_course_id=course_id)
+        session_manager.update_session(
+            user_id,
+            lessons_cache=lesson_list,
+            lessons_by_number=_index_by_number(lesson_list),
+            current_course_id=course_id,
+        )
         
         return {
             "success": True,
@@ -680,30 +800,29 @@ async def execute_function(
     elif function_name == "get_lesson_content":
         lesson_id = arguments.get("lesson_id")
         lesson_number = arguments.get("lesson_number")
-        course_id = arguments.get("course_id") or session.get("current_course_id")
+        course_id = arguments.get("course_id") or session.current_course_id
         
         # Find lesson by number
         if not lesson_id and lesson_number:
-            cached = session.get("lessons_cache", [])
-            for l in cached:
-                if l["number"] == lesson_number:
-                    lesson_id = l["id"]
-                    break
+            lesson_id = session.lessons_by_number.get(lesson_number)
         
         if not lesson_id:
             return {"success": False, "message": "Lesson not found. Please say the lesson number."}
         
-        lesson = lessons.get_lesson(db, lesson_id)
+        lesson = await lessons.get_lesson(db, lesson_id)
         if not lesson:
             return {"success": False, "message": "Lesson not found."}
         
         session_manager.update_session(user_id, mode="lesson", current_lesson_id=lesson_id, current_course_id=lesson.course_id)
         
         # Get lesson audio if available
-        lesson_audio = db.query(LessonAudio).filter(
-            LessonAudio.lesson_id == lesson_id,
-            LessonAudio.is_processed == True
-        ).first()
+        audio_result = await db.execute(
+            select(LessonAudio).where(
+                LessonAudio.lesson_id == lesson_id,
+                LessonAudio.is_processed == True
+            )
+        )
+        lesson_audio = audio_result.scalars().first()
         
         audio_url = lesson_audio.audio_url if lesson_audio else None
         
@@ -740,22 +859,25 @@ async def execute_function(
         }
     
     elif function_name == "mark_lesson_complete":
-        lesson_id = arguments.get("lesson_id") or session.get("current_lesson_id")
+        lesson_id = arguments.get("lesson_id") or session.current_lesson_id
         
         if not lesson_id:
             return {"success": False, "message": "No lesson selected."}
         
         # Check/create lesson progress
-        progress = db.query(LessonProgress).filter(
-            LessonProgress.student_id == user_id,
-            LessonProgress.lesson_id == lesson_id
-        ).first()
+        progress_result = await db.execute(
+            select(LessonProgress).where(
+                LessonProgress.student_id == user_id,
+                LessonProgress.lesson_id == lesson_id
+            )
+        )
+        progress = progress_result.scalars().first()
         
         if not progress:
             progress = LessonProgress(
                 student_id=user_id,
                 lesson_id=lesson_id,
-                completed=True,
+                is_completed=True,
                 completed_at=datetime.now()
             )
             db.add(progress)
@@ -763,25 +885,52 @@ async def execute_function(
             progress.is_completed = True
             progress.completed_at = datetime.now()
         
-        db.commit()
+        await db.commit()
         
         return {"success": True, "message": "Lesson marked as complete! Would you like to continue to the next lesson?"}
     
     # ==================== QUIZ FUNCTIONS ====================
     
     elif function_name == "list_all_quizzes":
-        enrollments = courses.get_user_enrollments(db, user_id)
+        enrollments = await courses.get_user_enrollments(db, user_id)
+
+        # One query for every quiz (questions preloaded) instead of one per
+        # course plus one attempt lookup per quiz
+        course_quizzes = await quizzes.get_quizzes_for_courses(
+            db, [e.course_id for e in enrollments]
+        )
+        quizzes_by_course = {}
+        for quiz in course_quizzes:
+            quizzes_by_course.setdefault(quiz.course_id, []).append(quiz)
+
+        # Latest attempt per quiz via a window function, so the database
+        # returns exactly one row per quiz instead of the student's whole
+        # attempt history
+        attempts_by_quiz = {}
+        if course_quizzes:
+            latest = (
+                select(
+                    QuizAttempt.quiz_id,
+                    QuizAttempt.score,
+                    QuizAttempt.passed,
+                    func.row_number().over(
+                        partition_by=QuizAttempt.quiz_id,
+                        order_by=QuizAttempt.time_submitted.desc()
+                    ).label("rn"),
+                )
+                .where(
+                    QuizAttempt.student_id == user_id,
+                    QuizAttempt.quiz_id.in_([q.id for q in course_quizzes])
+                )
+                .subquery()
+            )
+            attempt_result = await db.execute(select(latest).where(latest.c.rn == 1))
+            attempts_by_quiz = {row.quiz_id: row for row in attempt_result}
+
         all_quizzes = []
-        
         for enrollment in enrollments:
-            course_quizzes = quizzes.get_quizzes_by_course(db, enrollment.course_id)
-            for quiz in course_quizzes:
-                # Check if attempted
-                attempt = db.query(QuizAttempt).filter(
-                    QuizAttempt.student_id == user_id,
-                    QuizAttempt.quiz_id == quiz.id
-                ).order_by(QuizAttempt.time_submitted.desc()).first()
-                
+            for quiz in quizzes_by_course.get(enrollment.course_id, []):
+                attempt = attempts_by_quiz.get(quiz.id)
                 quiz_data = {
                     "number": len(all_quizzes) + 1,
                     "id": quiz.id,
@@ -795,7 +944,12 @@ async def execute_function(
                 }
                 all_quizzes.append(quiz_data)
         
-        session_manager.update_session(user_id, quizzes_cache=all_quizzes)
+        session_manager.update_session(
+            user_id,
+            quizzes_cache=all_quizzes,
+            quizzes_by_number=_index_by_number(all_quizzes),
+            quizzes_title_lower=_index_titles(all_quizzes),
+        )
         
         await send_context_update({
             "action": "show_quizzes",
@@ -820,31 +974,28 @@ async def execute_function(
         quiz_name = arguments.get("quiz_name")
         
         # Find quiz
-        quizzes_cache = session.get("quizzes_cache", [])
-        if quiz_number and quizzes_cache:
-            for q in quizzes_cache:
-                if q["number"] == quiz_number:
-                    quiz_id = q["id"]
-                    break
+        if quiz_number:
+            quiz_id = session.quizzes_by_number.get(quiz_number, quiz_id)
         
         if not quiz_id and quiz_name:
-            for q in quizzes_cache:
-                if quiz_name.lower() in q["title"].lower():
-                    quiz_id = q["id"]
-                    break
+            name_low = quiz_name.lower()
+            quiz_id = next(
+                (qid for title_low, qid in session.quizzes_title_lower if name_low in title_low),
+                None
+            )
         
         if not quiz_id:
             # Try current course
-            course_id = session.get("current_course_id")
+            course_id = session.current_course_id
             if course_id:
-                course_quizzes = quizzes.get_quizzes_by_course(db, course_id)
+                course_quizzes = await quizzes.get_quizzes_by_course(db, course_id)
                 if quiz_number and quiz_number <= len(course_quizzes):
                     quiz_id = course_quizzes[quiz_number - 1].id
         
         if not quiz_id:
             return {"success": False, "message": "Quiz not found. Say 'show my quizzes' to see available quizzes."}
         
-        quiz = quizzes.get_quiz(db, quiz_id)
+        quiz = await quizzes.get_quiz(db, quiz_id)
         if not quiz:
             return {"success": False, "message": "Quiz not found."}
         
@@ -897,15 +1048,15 @@ async def execute_function(
         }
     
     elif function_name == "read_current_question":
-        if session.get("mode") != "quiz" or not session.get("quiz_questions"):
+        if session.mode != "quiz" or not session.quiz_questions:
             return {"success": False, "message": "No quiz in progress. Say 'start quiz' to begin a quiz."}
         
-        idx = session.get("current_question_index", 0)
-        questions = session.get("quiz_questions", [])
+        idx = session.current_question_index
+        questions = session.quiz_questions
         q = questions[idx]
         options_text = ", ".join([f"Option {chr(65+i)}: {opt}" for i, opt in enumerate(q["options"])])
         
-        answers = session.get("quiz_answers", {})
+        answers = session.quiz_answers
         answered = answers.get(idx)
         answer_status = f"Your current answer: Option {chr(65+answered)}. " if answered is not None else "Not answered yet. "
         
@@ -917,7 +1068,7 @@ async def execute_function(
         }
     
     elif function_name == "answer_question":
-        if session.get("mode") != "quiz":
+        if session.mode != "quiz":
             return {"success": False, "message": "No quiz in progress."}
         
         answer = arguments.get("answer", "").upper().strip()
@@ -939,8 +1090,8 @@ async def execute_function(
         if answer_index is None:
             return {"success": False, "message": "I didn't understand that answer. Please say A, B, C, or D."}
         
-        idx = session.get("current_question_index", 0)
-        questions = session.get("quiz_questions", [])
+        idx = session.current_question_index
+        questions = session.quiz_questions
         q = questions[idx]
         
         if answer_index >= len(q["options"]):
@@ -963,19 +1114,19 @@ async def execute_function(
         }
     
     elif function_name == "confirm_answer":
-        if session.get("mode") != "quiz":
+        if session.mode != "quiz":
             return {"success": False, "message": "No quiz in progress."}
         
-        pending = session.get("pending_answer")
+        pending = session.pending_answer
         if pending is None:
             return {"success": False, "message": "No answer pending confirmation. Please select an answer first."}
         
         confirmed = arguments.get("confirmed", False)
         
         if confirmed:
-            idx = session.get("current_question_index", 0)
-            questions = session.get("quiz_questions", [])
-            answers = dict(session.get("quiz_answers", {}))  # Make a copy to ensure update works
+            idx = session.current_question_index
+            questions = session.quiz_questions
+            answers = dict(session.quiz_answers)  # Make a copy to ensure update works
             
             answers[idx] = pending
             print(f"[DEBUG] Saving answer for question {idx}: option {pending}, total answers: {answers}")
@@ -983,7 +1134,7 @@ async def execute_function(
             
             # Verify it was saved
             updated_session = session_manager.get_session(user_id)
-            print(f"[DEBUG] After update, quiz_answers: {updated_session.get('quiz_answers')}")
+            print(f"[DEBUG] After update, quiz_answers: {updated_session.quiz_answers}")
             
             await send_context_update({
                 "action": "answer_confirmed",
@@ -1019,18 +1170,18 @@ async def execute_function(
                 }
         else:
             session_manager.update_session(user_id, pending_answer=None)
-            await send_context_update({"action": "answer_cancelled", "questionIndex": session.get("current_question_index", 0)})
+            await send_context_update({"action": "answer_cancelled", "questionIndex": session.current_question_index})
             return {"success": True, "message": "Answer cancelled. Please select a different option: A, B, C, or D."}
     
     elif function_name == "navigate_question":
-        if session.get("mode") != "quiz":
+        if session.mode != "quiz":
             return {"success": False, "message": "No quiz in progress."}
         
         direction = arguments.get("direction")
         question_number = arguments.get("question_number")
         
-        questions = session.get("quiz_questions", [])
-        idx = session.get("current_question_index", 0)
+        questions = session.quiz_questions
+        idx = session.current_question_index
         new_idx = idx
         
         if question_number:
@@ -1054,7 +1205,7 @@ async def execute_function(
         # Read the question
         q = questions[new_idx]
         options_text = ", ".join([f"Option {chr(65+i)}: {opt}" for i, opt in enumerate(q["options"])])
-        answers = session.get("quiz_answers", {})
+        answers = session.quiz_answers
         answered = answers.get(new_idx)
         answer_status = f"Your answer: Option {chr(65+answered)}. " if answered is not None else ""
         
@@ -1064,13 +1215,13 @@ async def execute_function(
         }
     
     elif function_name == "submit_quiz":
-        if session.get("mode") != "quiz":
+        if session.mode != "quiz":
             return {"success": False, "message": "No quiz in progress."}
         
         confirm = arguments.get("confirm", False)
         
-        answers = session.get("quiz_answers", {})
-        questions = session.get("quiz_questions", [])
+        answers = session.quiz_answers
+        questions = session.quiz_questions
         answered = len(answers)
         total = len(questions)
         
@@ -1086,8 +1237,8 @@ async def execute_function(
             }
         
         # Get quiz info
-        quiz_id = session.get("current_quiz_id")
-        quiz = quizzes.get_quiz(db, quiz_id)
+        quiz_id = session.current_quiz_id
+        quiz = await quizzes.get_quiz(db, quiz_id)
         
         # Check if quiz is auto-graded or manual (None/True = auto-graded, False = manual)
         is_auto_graded = getattr(quiz, 'is_auto_graded', True)
@@ -1125,7 +1276,7 @@ async def execute_function(
                 time_submitted=datetime.now()
             )
             db.add(attempt)
-            db.flush()  # Get the attempt ID
+            await db.flush()  # Get the attempt ID
             
             # Save individual Answer records for each question
             for idx, q in enumerate(questions):
@@ -1145,7 +1296,7 @@ async def execute_function(
                 )
                 db.add(answer_record)
             
-            db.commit()
+            await db.commit()
             
             await send_context_update({
                 "action": "quiz_completed",
@@ -1172,7 +1323,7 @@ async def execute_function(
                 time_submitted=datetime.now()
             )
             db.add(attempt)
-            db.flush()  # Get the attempt ID
+            await db.flush()  # Get the attempt ID
             
             # Save individual Answer records for each question (without grading)
             for idx, q in enumerate(questions):
@@ -1190,7 +1341,7 @@ async def execute_function(
                 )
                 db.add(answer_record)
             
-            db.commit()
+            await db.commit()
             
             await send_context_update({
                 "action": "quiz_completed",
@@ -1221,11 +1372,11 @@ async def execute_function(
         }
     
     elif function_name == "get_quiz_status":
-        if session.get("mode") != "quiz":
+        if session.mode != "quiz":
             return {"success": False, "message": "No quiz in progress."}
         
-        answers = session.get("quiz_answers", {})
-        questions = session.get("quiz_questions", [])
+        answers = session.quiz_answers
+        questions = session.quiz_questions
         answered = len(answers)
         total = len(questions)
         unanswered = [i+1 for i in range(total) if i not in answers]
@@ -1235,8 +1386,8 @@ async def execute_function(
             "answered": answered,
             "total": total,
             "unanswered": unanswered,
-            "current_question": session.get("current_question_index", 0) + 1,
-            "message": f"You're on question {session.get('current_question_index', 0) + 1}. " +
+            "current_question": session.current_question_index + 1,
+            "message": f"You're on question {session.current_question_index + 1}. " +
                       f"Answered: {answered} of {total}. " +
                       (f"Unanswered: {', '.join(map(str, unanswered[:5]))}." if unanswered else "All questions answered!")
         }
@@ -1244,16 +1395,19 @@ async def execute_function(
     # ==================== ASSIGNMENT FUNCTIONS ====================
     
     elif function_name == "list_all_assignments":
-        enrollments = courses.get_user_enrollments(db, user_id)
+        enrollments = await courses.get_user_enrollments(db, user_id)
         all_assignments = []
         
         for enrollment in enrollments:
-            course_assignments = assignments.get_assignments_by_course(db, enrollment.course_id)
+            course_assignments = await assignments.get_assignments_by_course(db, enrollment.course_id)
             for assignment in course_assignments:
-                submission = db.query(Submission).filter(
-                    Submission.student_id == user_id,
-                    Submission.assignment_id == assignment.id
-                ).first()
+                submission_result = await db.execute(
+                    select(Submission).where(
+                        Submission.student_id == user_id,
+                        Submission.assignment_id == assignment.id
+                    )
+                )
+                submission = submission_result.scalars().first()
                 
                 # Determine submission status
                 submission_status = "not_submitted"
@@ -1277,7 +1431,11 @@ async def execute_function(
                 }
                 all_assignments.append(assignment_data)
         
-        session_manager.update_session(user_id, assignments_cache=all_assignments)
+        session_manager.update_session(
+            user_id,
+            assignments_cache=all_assignments,
+            assignments_by_number=_index_by_number(all_assignments),
+        )
         
         await send_context_update({
             "action": "show_assignments",
@@ -1302,24 +1460,23 @@ async def execute_function(
         assignment_id = arguments.get("assignment_id")
         assignment_number = arguments.get("assignment_number")
         
-        assignments_cache = session.get("assignments_cache", [])
-        if assignment_number and assignments_cache:
-            for a in assignments_cache:
-                if a["number"] == assignment_number:
-                    assignment_id = a["id"]
-                    break
+        if assignment_number:
+            assignment_id = session.assignments_by_number.get(assignment_number, assignment_id)
         
         if not assignment_id:
             return {"success": False, "message": "Assignment not found. Say 'show my assignments' first."}
         
-        assignment = assignments.get_assignment(db, assignment_id)
+        assignment = await assignments.get_assignment(db, assignment_id)
         if not assignment:
             return {"success": False, "message": "Assignment not found."}
         
-        submission = db.query(Submission).filter(
-            Submission.student_id == user_id,
-            Submission.assignment_id == assignment_id
-        ).first()
+        submission_result = await db.execute(
+            select(Submission).where(
+                Submission.student_id == user_id,
+                Submission.assignment_id == assignment_id
+            )
+        )
+        submission = submission_result.scalars().first()
         
         session_manager.update_session(user_id, current_assignment_id=assignment_id)
         
@@ -1377,7 +1534,7 @@ async def execute_function(
         }
     
     elif function_name == "start_assignment_submission":
-        assignment_id = arguments.get("assignment_id") or session.get("current_assignment_id")
+        assignment_id = arguments.get("assignment_id") or session.current_assignment_id
         
         if not assignment_id:
             return {"success": False, "message": "Please select an assignment first."}
@@ -1391,13 +1548,13 @@ async def execute_function(
         }
     
     elif function_name == "dictate_assignment_answer":
-        if session.get("mode") != "assignment":
+        if session.mode != "assignment":
             return {"success": False, "message": "No assignment in progress. Say 'start assignment' first."}
         
         content = arguments.get("content", "")
         append = arguments.get("append", True)
         
-        current_content = session.get("assignment_content", "")
+        current_content = session.assignment_content
         if append:
             new_content = current_content + " " + content if current_content else content
         else:
@@ -1413,21 +1570,21 @@ async def execute_function(
         }
     
     elif function_name == "review_assignment_submission":
-        if session.get("mode") != "assignment":
+        if session.mode != "assignment":
             return {"success": False, "message": "No assignment in progress."}
         
-        content = session.get("assignment_content", "")
+        content = session.assignment_content
         if not content:
             return {"success": True, "message": "You haven't dictated anything yet."}
         
         return {"success": True, "content": content, "message": f"Here's what you've written: {content}"}
     
     elif function_name == "submit_assignment":
-        if session.get("mode") != "assignment":
+        if session.mode != "assignment":
             return {"success": False, "message": "No assignment in progress."}
         
         confirm = arguments.get("confirm", False)
-        content = session.get("assignment_content", "")
+        content = session.assignment_content
         
         if not content:
             return {"success": False, "message": "You haven't written anything yet. Please dictate your answer first."}
@@ -1437,7 +1594,7 @@ async def execute_function(
             return {"success": False, "message": f"Your submission has {word_count} words. Say 'yes, submit' to confirm."}
         
         # # Create submission
-        assignment_id = session.get("current_assignment_id")
+        assignment_id = session.current_assignment_id
         # submission = Submission(
         #     student_id=user_id,
         #     assignment_id=assignment_id,
@@ -1447,10 +1604,13 @@ async def execute_function(
         # db.add(submission)
         # db.commit()
         
-        check_existing = db.query(Submission).filter(
-            Submission.student_id == user_id,
-            Submission.assignment_id == assignment_id
-        ).first()
+        existing_result = await db.execute(
+            select(Submission).where(
+                Submission.student_id == user_id,
+                Submission.assignment_id == assignment_id
+            )
+        )
+        check_existing = existing_result.scalars().first()
         
         if check_existing:
             # Update existing submission
@@ -1467,7 +1627,7 @@ async def execute_function(
                 status='submitted'
             )
             db.add(new_submission)
-        db.commit()
+        await db.commit()
         
         
         await send_context_update({
@@ -1483,7 +1643,7 @@ async def execute_function(
     # ==================== PROGRESS & NAVIGATION ====================
     
     elif function_name == "get_student_progress":
-        enrollments = courses.get_user_enrollments(db, user_id)
+        enrollments = await courses.get_user_enrollments(db, user_id)
         
         progress_data = []
         total_progress = 0
@@ -1554,6 +1714,23 @@ async def execute_function(
     return {"success": False, "message": "Unknown function"}
 
 
+async def prewarm_session(user_id: int) -> None:
+    """Fill the list caches right after connect.
+
+    Students predictably open with "what courses do I have" or "what
+    quizzes"; warming courses, quizzes and assignments while the OpenAI
+    handshake is in flight means those first tool calls answer from the
+    session instead of paying their DB round trips. Runs on its own
+    session so it never races the socket's tool calls.
+    """
+    async with AsyncSessionLocal() as db:
+        for fn in ("list_enrolled_courses", "list_all_quizzes", "list_all_assignments"):
+            try:
+                await execute_function(fn, {}, user_id, db)
+            except Exception as e:
+                print(f"Prewarm {fn} failed: {e}")
+
+
 @router.websocket("/realtime/{token}")
 async def voice_realtime_websocket(websocket: WebSocket, token: str):
     """
@@ -1562,33 +1739,40 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
     """
     await websocket.accept()
     
-    # Verify token and get user
-    db = next(get_db())
+    # Verify token and get user; the session lives for the whole socket and
+    # never blocks the loop
+    db = AsyncSessionLocal()
     try:
-        user = get_user_from_token(token, db)
+        user = await get_user_from_token(token, db)
         if not user:
-            await websocket.send_json({"type": "error", "message": "Invalid token"})
+            await send_json_fast(websocket, {"type": "error", "message": "Invalid token"})
             await websocket.close()
+            await db.close()
             return
     except Exception as e:
-        await websocket.send_json({"type": "error", "message": str(e)})
+        await send_json_fast(websocket, {"type": "error", "message": str(e)})
         await websocket.close()
+        await db.close()
         return
-    
+
     # Create session
     session = session_manager.create_session(user.id)
-    
+
     # Check for OpenAI API key
     if not OPENAI_API_KEY:
-        await websocket.send_json({
-            "type": "error", 
+        await send_json_fast(websocket, {
+            "type": "error",
             "message": "OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
         })
         await websocket.close()
+        await db.close()
         return
     
+    # Warm the list caches concurrently with the OpenAI handshake below
+    prewarm_task = asyncio.create_task(prewarm_session(user.id))
+
     openai_ws = None
-    
+
     try:
         # Connect to OpenAI Realtime API
         import websockets
@@ -1599,33 +1783,29 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
         ]
         
         async with websockets.connect(OPENAI_REALTIME_URL, additional_headers=headers) as openai_ws:
-            # Send session configuration
-            session_config = {
-                "type": "session.update",
-                "session": {
-                    "modalities": ["text", "audio"],
-                    "instructions": SYSTEM_INSTRUCTIONS + f"\n\nCurrent user: {user.full_name} (Student)",
-                    "voice": "alloy",
-                    "input_audio_format": "pcm16",
-                    "output_audio_format": "pcm16",
-                    "input_audio_transcription": {
-                        "model": "gpt-4o-transcribe"
-                    },
-                    "turn_detection": {
-                        "type": "server_vad",
-                        "threshold": 0.3,
-                        "prefix_padding_ms": 500,
-                        "silence_duration_ms": 800
-                    },
-                    "tools": VOICE_TOOLS,
-                    "tool_choice": "auto",
-                    "temperature": 0.8
-                }
-            }
-            await openai_ws.send(json.dumps(session_config))
+            # Send session configuration; only the per-user fields are
+            # encoded here, the tools blob is spliced in pre-serialized
+            await openai_ws.send(_session_update_text({
+                "modalities": ["text", "audio"],
+                "instructions": SYSTEM_INSTRUCTIONS + f"\n\nCurrent user: {user.full_name} (Student)",
+                "voice": "alloy",
+                "input_audio_format": "pcm16",
+                "output_audio_format": "pcm16",
+                "input_audio_transcription": {
+                    "model": "gpt-4o-transcribe"
+                },
+                "turn_detection": {
+                    "type": "server_vad",
+                    "threshold": 0.3,
+                    "prefix_padding_ms": 500,
+                    "silence_duration_ms": 800
+                },
+                "tool_choice": "auto",
+                "temperature": 0.8
+            }))
             
             # Notify client that connection is ready
-            await websocket.send_json({
+            await send_json_fast(websocket, {
                 "type": "session.created",
                 "message": "Voice assistant connected. You can start speaking."
             })
@@ -1638,7 +1818,7 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
                         data = await websocket.receive()
                         
                         if "text" in data:
-                            message = json.loads(data["text"])
+                            message = orjson.loads(data["text"])
                             msg_type = message.get("type")
                             
                             # Handle different message types from client
@@ -1647,26 +1827,26 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
                                 audio_chunks_received += 1
                                 if audio_chunks_received % 50 == 0:  # Log every 50 chunks
                                     print(f"Received {audio_chunks_received} audio chunks from client")
-                                await openai_ws.send(json.dumps(message))
+                                await openai_ws.send(orjson_dumps_text(message))
                             
                             elif msg_type == "input_audio_buffer.commit":
                                 # Commit audio buffer
                                 print(f"Committing audio buffer after {audio_chunks_received} chunks")
-                                await openai_ws.send(json.dumps(message))
+                                await openai_ws.send(orjson_dumps_text(message))
                             
                             elif msg_type == "conversation.item.create":
                                 # Text input
                                 print(f"Text input received: {message}")
-                                await openai_ws.send(json.dumps(message))
+                                await openai_ws.send(orjson_dumps_text(message))
                             
                             elif message.get("type") == "response.create":
                                 # Request response
-                                await openai_ws.send(json.dumps(message))
+                                await openai_ws.send(orjson_dumps_text(message))
                         
                         elif "bytes" in data:
                             # Binary audio data
                             audio_base64 = base64.b64encode(data["bytes"]).decode()
-                            await openai_ws.send(json.dumps({
+                            await openai_ws.send(orjson_dumps_text({
                                 "type": "input_audio_buffer.append",
                                 "audio": audio_base64
                             }))
@@ -1685,7 +1865,7 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
                 """Forward messages from OpenAI to client, handling function calls"""
                 try:
                     async for message in openai_ws:
-                        event = json.loads(message)
+                        event = orjson.loads(message)
                         event_type = event.get("type")
                         
                         # Log important events
@@ -1715,7 +1895,7 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
                         if event_type == "response.function_call_arguments.done":
                             call_id = event.get("call_id")
                             function_name = event.get("name")
-                            arguments = json.loads(event.get("arguments", "{}"))
+                            arguments = orjson.loads(event.get("arguments", "{}"))
                             
                             print(f"Function call: {function_name} with args: {arguments}")
                             
@@ -1736,17 +1916,17 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
                                 "item": {
                                     "type": "function_call_output",
                                     "call_id": call_id,
-                                    "output": json.dumps(result)
+                                    "output": orjson_dumps_text(result)
                                 }
                             }
-                            await openai_ws.send(json.dumps(function_output))
+                            await openai_ws.send(orjson_dumps_text(function_output))
                             
                             # Request a response after function call
-                            await openai_ws.send(json.dumps({"type": "response.create"}))
+                            await openai_ws.send(orjson_dumps_text({"type": "response.create"}))
                             
                             # Send navigation command to client if present
                             if result.get("navigation"):
-                                await websocket.send_json({
+                                await send_json_fast(websocket, {
                                     "type": "navigation",
                                     "data": result["navigation"]
                                 })
@@ -1781,7 +1961,7 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
                                 print(f"    Full event: {json.dumps(event, indent=2)}")
                             elif event_type == "error":
                                 print(f">>> ERROR EVENT: {json.dumps(event, indent=2)}")
-                            await websocket.send_json(event)
+                            await send_json_fast(websocket, event)
                 
                 except WebSocketDisconnect:
                     print("Client disconnected in forward_to_client")
@@ -1811,7 +1991,7 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
     except Exception as e:
         print(f"WebSocket error: {e}")
         try:
-            await websocket.send_json({
+            await send_json_fast(websocket, {
                 "type": "error",
                 "message": f"Connection error: {str(e)}"
             })
@@ -1819,7 +1999,9 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
             pass  # WebSocket may already be closed
     
     finally:
+        prewarm_task.cancel()
         session_manager.remove_session(user.id)
+        await db.close()
         try:
             await websocket.close()
         except:
@@ -1827,9 +2009,7 @@ async def voice_realtime_websocket(websocket: WebSocket, token: str):
 
 
 @router.get("/session-token")
-async def get_voice_session_token(
-    db: Session = Depends(get_db)
-):
+async def get_voice_session_token():
     """Get a temporary token for voice WebSocket connection - this endpoint is deprecated, use existing auth token instead"""
     from api.dependencies import get_current_user
     
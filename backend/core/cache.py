@@ -0,0 +1,52 @@
+import os
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+# Cache settings
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))  # ? in seconds
+CACHE_PREFIX = "e4a:"
+
+# Redis client (None when REDIS_URL is not configured -> caching disabled)
+redis_client = None
+if aioredis and REDIS_URL:
+    redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+
+
+async def cache_get(key: str):
+    """Get a cached value, or None on miss / when caching is disabled"""
+    if not redis_client:
+        return None
+
+    try:
+        return await redis_client.get(CACHE_PREFIX + key)
+    except Exception as e:
+        print(f"Cache get error for {key}: {e}")
+        return None
+
+
+async def cache_set(key: str, value: str, ttl: int = CACHE_TTL):
+    """Store a value with a TTL"""
+    if not redis_client:
+        return
+
+    try:
+        await redis_client.set(CACHE_PREFIX + key, value, ex=ttl)
+    except Exception as e:
+        print(f"Cache set error for {key}: {e}")
+
+
+async def cache_invalidate(*prefixes: str):
+    """Delete all cached keys starting with any of the given prefixes"""
+    if not redis_client:
+        return
+
+    try:
+        for prefix in prefixes:
+            async for key in redis_client.scan_iter(match=CACHE_PREFIX + prefix + "*"):
+                await redis_client.delete(key)
+    except Exception as e:
+        print(f"Cache invalidate error for {prefixes}: {e}")
@@ -0,0 +1,41 @@
+"""Batch auto-grading for quiz submissions.
+
+The comparison rules live here as pure functions so submit paths and any
+future bulk-regrade job share one implementation. Grading runs over the
+whole submission at once: each question's correct answer is normalized a
+single time per batch instead of once per comparison, which is where the
+CPython time goes on large quizzes.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+from db.quizzes import Question, QuestionType
+
+
+def grade_batch(pairs: Iterable[Tuple[Question, Optional[str]]]) -> List[Tuple[bool, float]]:
+    """Grade (question, answer_text) pairs; returns (is_correct, points_earned) per pair.
+
+    MCQ is an exact match on the stripped answer, TRUE_FALSE is
+    case-insensitive equality, SHORT_ANSWER is a case-insensitive keyword
+    containment check. Unanswered or ungradable pairs score zero.
+    """
+    # Normalize each correct answer once per batch, keyed by question id
+    normalized: dict = {}
+    results: List[Tuple[bool, float]] = []
+
+    for question, answer_text in pairs:
+        is_correct = False
+        if answer_text and question.correct_answer:
+            key = question.id
+            if key not in normalized:
+                normalized[key] = question.correct_answer.lower()
+
+            if question.question_type == QuestionType.MCQ:
+                is_correct = answer_text.strip() == question.correct_answer
+            elif question.question_type == QuestionType.TRUE_FALSE:
+                is_correct = answer_text.lower() == normalized[key]
+            elif question.question_type == QuestionType.SHORT_ANSWER:
+                is_correct = normalized[key] in answer_text.lower()
+
+        results.append((is_correct, float(question.points) if is_correct else 0.0))
+
+    return results
@@ -0,0 +1,29 @@
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.courses import Course
+
+# Course ownership rarely changes, so a short-TTL in-process cache absorbs
+# the "SELECT course just to compare teacher_id" query that nearly every
+# teacher endpoint repeats. Writes to Course must call invalidate_course_owner.
+_course_owner: TTLCache = TTLCache(maxsize=10000, ttl=60)
+
+
+async def course_owner_id(db: AsyncSession, course_id: int):
+    """Get the teacher_id owning a course, or None if the course doesn't exist"""
+    if course_id in _course_owner:
+        return _course_owner[course_id]
+
+    teacher_id = (await db.execute(
+        select(Course.teacher_id).where(Course.id == course_id)
+    )).scalar_one_or_none()
+
+    # Only cache hits; a miss may be a course created moments ago
+    if teacher_id is not None:
+        _course_owner[course_id] = teacher_id
+    return teacher_id
+
+
+def invalidate_course_owner(course_id: int):
+    """Drop a course from the ownership cache after it is updated or deleted"""
+    _course_owner.pop(course_id, None)
@@ -0,0 +1,31 @@
+import os
+
+# Optional durable task queue (arq). When REDIS_URL is set and arq is
+# installed, TTS jobs go to a separate worker process (see worker.py) that
+# survives API restarts and retries failures; otherwise callers fall back
+# to in-process BackgroundTasks.
+try:
+    from arq import create_pool
+    from arq.connections import RedisSettings
+except ImportError:  # pragma: no cover - optional dependency
+    create_pool = None
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+_pool = None
+
+
+async def enqueue_job(job_name: str, *args) -> bool:
+    """Enqueue a job on the arq worker. Returns False if no queue is configured"""
+    global _pool
+    if create_pool is None or not REDIS_URL:
+        return False
+
+    try:
+        if _pool is None:
+            _pool = await create_pool(RedisSettings.from_dsn(REDIS_URL))
+        await _pool.enqueue_job(job_name, *args)
+        return True
+    except Exception as e:
+        print(f"Queue enqueue error: {e}")
+        return False
@@ -1,6 +1,8 @@
 import os
 import bcrypt
-from jose import jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
+import jwt
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 load_dotenv()
@@ -8,22 +10,34 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "testing")
 ALGORITHM = "HS256"
 
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+
 
 def hash_password(password: str):
     
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    
-    return hashed.decode('utf-8')
+    return password_hasher.hash(password)
 
 def verify_password(password: str, hashed: str):
     
+    if hashed.startswith("$argon2"):
+        try:
+            return password_hasher.verify(hashed, password)
+        except VerifyMismatchError:
+            return False
+    
+    # Legacy bcrypt hashes from before the Argon2 switch
     password_bytes = password.encode('utf-8')
     hashed_bytes = hashed.encode('utf-8')
     
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
+def password_needs_rehash(hashed: str):
+    
+    if not hashed.startswith("$argon2"):
+        return True
+    
+    return password_hasher.check_needs_rehash(hashed)
+
 def create_access_token(data: dict):
     
     payload = data.copy()
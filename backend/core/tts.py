@@ -38,6 +38,20 @@ def generate_tts_audio(text: str, language: str = "en", filename: str = None) ->
         return None
 
 
+def generate_tts_audio_cached(text: str, language: str = "en") -> str:
+    """
+    Generate TTS audio keyed by a content hash of (language, normalized text)
+    Identical content reuses the stored file instead of re-synthesizing
+    """
+    if not text:
+        return None
+
+    normalized = " ".join(text.split())
+    content_hash = hashlib.sha256(f"{language}|{normalized}".encode()).hexdigest()
+
+    return generate_tts_audio(text, language=language, filename=f"tts_{content_hash}.mp3")
+
+
 def delete_audio_file(audio_url: str):
     """Delete an audio file"""
     if not audio_url:
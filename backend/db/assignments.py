@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Index, UniqueConstraint, func, select
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -25,9 +25,12 @@ class SubmissionStatus(str, enum.Enum):
 class Assignment(Base):
     
     __tablename__ = "assignments"
+    __table_args__ = (
+        Index("ix_assignments_course_published", "course_id", "is_published"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
     
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
@@ -50,12 +53,12 @@ class Assignment(Base):
     is_published = Column(Boolean, default=False)
     
     # * Timestamps
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # * Relationships
     course = relationship("Course", back_populates="assignments")
-    submissions = relationship("Submission", back_populates="assignment", cascade="all, delete-orphan")
+    submissions = relationship("Submission", back_populates="assignment", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
         return f"<Assignment {self.title}>"
@@ -64,9 +67,12 @@ class Assignment(Base):
 class Submission(Base):
     
     __tablename__ = "submissions"
+    __table_args__ = (
+        UniqueConstraint("assignment_id", "student_id", name="uq_submission_assignment_student"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    assignment_id = Column(Integer, ForeignKey("assignments.id"), nullable=False)
+    assignment_id = Column(Integer, ForeignKey("assignments.id", ondelete="CASCADE"), nullable=False)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # * Submission content
@@ -85,23 +91,26 @@ class Submission(Base):
     is_late = Column(Boolean, default=False)
     
     # * Timestamps
-    submitted_at = Column(DateTime, default=datetime.now)
+    submitted_at = Column(DateTime, server_default=func.now())
     graded_at = Column(DateTime, nullable=True)
     
     # * Relationships
     assignment = relationship("Assignment", back_populates="submissions")
     student = relationship("User", back_populates="submissions")
-    feedback = relationship("Feedback", back_populates="submission", cascade="all, delete-orphan")
+    feedback = relationship("Feedback", back_populates="submission", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
         return f"<Submission Assignment:{self.assignment_id} Student:{self.student_id}>"
 
 
 
-def get_assignments_by_course(db, course_id: int):
-    return db.query(Assignment).filter(Assignment.course_id == course_id, Assignment.is_published == True).all()
+async def get_assignments_by_course(db, course_id: int):
+    result = await db.execute(
+        select(Assignment).where(Assignment.course_id == course_id, Assignment.is_published == True)
+    )
+    return result.scalars().all()
 
 
-def get_assignment(db, assignment_id: int):
-    return db.query(Assignment).filter(Assignment.id == assignment_id).first()
+async def get_assignment(db, assignment_id: int):
+    return await db.get(Assignment, assignment_id)
 
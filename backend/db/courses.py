@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index, UniqueConstraint, func, select
+from sqlalchemy.orm import relationship, selectinload
 from datetime import datetime
 from .session import Base
 
@@ -24,15 +24,15 @@ class Course(Base):
     is_published = Column(Boolean, default=False)
     
     # * Timestamps
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # * Relationships
     teacher = relationship("User", back_populates="courses_taught")
-    lessons = relationship("Lesson", back_populates="course", cascade="all, delete-orphan")
-    assignments = relationship("Assignment", back_populates="course", cascade="all, delete-orphan")
-    quizzes = relationship("Quiz", back_populates="course", cascade="all, delete-orphan")
-    enrollments = relationship("Enrollment", back_populates="course", cascade="all, delete-orphan")
+    lessons = relationship("Lesson", back_populates="course", cascade="all, delete-orphan", passive_deletes=True)
+    assignments = relationship("Assignment", back_populates="course", cascade="all, delete-orphan", passive_deletes=True)
+    quizzes = relationship("Quiz", back_populates="course", cascade="all, delete-orphan", passive_deletes=True)
+    enrollments = relationship("Enrollment", back_populates="course", cascade="all, delete-orphan", passive_deletes=True)
     
     
     
@@ -43,10 +43,14 @@ class Course(Base):
 class Enrollment(Base):
     
     __tablename__ = "enrollments"
+    __table_args__ = (
+        UniqueConstraint("student_id", "course_id", name="uq_enrollment_student_course"),
+        Index("ix_enrollments_course_id", "course_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
     
     # * Progress tracking
     progress_percentage = Column(Integer, default=0)
@@ -58,7 +62,7 @@ class Enrollment(Base):
     completion_date = Column(DateTime, nullable=True)
     
     # * Timestamps
-    enrolled_at = Column(DateTime, default=datetime.now)
+    enrolled_at = Column(DateTime, server_default=func.now())
     
     # * Relationships
     student = relationship("User", back_populates="enrollments", foreign_keys=[student_id])
@@ -69,38 +73,52 @@ class Enrollment(Base):
 
 
 
-def get_user_enrollments(db, user_id: int):
-    return db.query(Enrollment).filter(Enrollment.student_id == user_id).all()
+async def get_user_enrollments(db, user_id: int):
+    # Callers dereference enrollment.course; preload it so iterating the
+    # list does not lazy-load one course per row
+    result = await db.execute(
+        select(Enrollment)
+        .options(selectinload(Enrollment.course))
+        .where(Enrollment.student_id == user_id)
+    )
+    return result.scalars().all()
 
 
-def get_courses(db, skip: int = 0, limit: int = 100, published_only: bool = False):
-    query = db.query(Course)
+async def get_courses(db, skip: int = 0, limit: int = 100, published_only: bool = False):
+    query = select(Course)
     if published_only:
-        query = query.filter(Course.is_published == True, Course.is_active == True)
-    return query.offset(skip).limit(limit).all()
+        query = query.where(Course.is_published == True, Course.is_active == True)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.scalars().all()
 
 
-def get_course(db, course_id: int):
-    return db.query(Course).filter(Course.id == course_id).first()
+async def get_course(db, course_id: int):
+    return await db.get(Course, course_id)
 
 
-def get_courses_by_name(db, name_substr: str):
-    return db.query(Course).filter(Course.title.ilike(f"%{name_substr}%")).all()
+async def get_courses_by_name(db, name_substr: str):
+    result = await db.execute(
+        select(Course).where(Course.title.ilike(f"%{name_substr}%"))
+    )
+    return result.scalars().all()
 
 
-def get_enrollment(db, user_id: int, course_id: int):
-    return db.query(Enrollment).filter(
-        Enrollment.student_id == user_id,
-        Enrollment.course_id == course_id
-    ).first()
+async def get_enrollment(db, user_id: int, course_id: int):
+    result = await db.execute(
+        select(Enrollment).where(
+            Enrollment.student_id == user_id,
+            Enrollment.course_id == course_id
+        )
+    )
+    return result.scalars().first()
 
 
-def create_enrollment(db, user_id: int, course_id: int):
+async def create_enrollment(db, user_id: int, course_id: int):
     enrollment = Enrollment(
         student_id=user_id,
         course_id=course_id
     )
     db.add(enrollment)
-    db.commit()
-    db.refresh(enrollment)
+    await db.commit()
+    await db.refresh(enrollment)
     return enrollment
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -16,11 +16,15 @@ class FeedbackType(str, enum.Enum):
 class Feedback(Base):
     
     __tablename__ = "feedback"
+    __table_args__ = (
+        Index("ix_feedback_student_created", "student_id", "created_at"),
+        Index("ix_feedback_teacher_created", "teacher_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=True)
+    submission_id = Column(Integer, ForeignKey("submissions.id", ondelete="CASCADE"), nullable=True)
     
     feedback_type = Column(Enum(FeedbackType), default=FeedbackType.GENERAL)
     
@@ -33,8 +37,8 @@ class Feedback(Base):
     read_at = Column(DateTime, nullable=True)
     
     # * Timestamps
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # * Relationships
     teacher = relationship("User", foreign_keys=[teacher_id], back_populates="feedback_given")
@@ -1,7 +1,6 @@
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Index, func, select
 from sqlalchemy.orm import relationship
-from datetime import datetime
 import enum
 from .session import Base
 
@@ -19,9 +18,18 @@ class ContentType(str, enum.Enum):
 class Lesson(Base):
     
     __tablename__ = "lessons"
-    
+    # Fetch server-generated timestamps via RETURNING at flush time instead
+    # of expiring them (an expired read would need a lazy SELECT, which the
+    # async session cannot issue outside a handler)
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Listing filters on (course_id, is_published) and orders by
+        # order_index, so the ordering comes straight off the index
+        Index("ix_lessons_course_pub_order", "course_id", "is_published", "order_index"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
-    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
     
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
@@ -41,13 +49,13 @@ class Lesson(Base):
     is_published = Column(Boolean, default=False)
     
     # * Timestamps
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # * Relationships
     course = relationship("Course", back_populates="lessons")
-    lesson_audio = relationship("LessonAudio", back_populates="lesson", cascade="all, delete-orphan")
-    progress = relationship("LessonProgress", back_populates="lesson", cascade="all, delete-orphan")
+    audio = relationship("LessonAudio", back_populates="lesson", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+    progress = relationship("LessonProgress", back_populates="lesson", cascade="all, delete-orphan", passive_deletes=True)
     
     @property
     def duration_minutes(self) -> Optional[int]:
@@ -62,9 +70,14 @@ class Lesson(Base):
 class LessonAudio(Base):
     
     __tablename__ = "lesson_audio"
-    
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # One audio row per lesson; also the conflict target for upserts
+        Index("ix_lesson_audio_lesson_id", "lesson_id", unique=True),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
-    lesson_id = Column(Integer, ForeignKey("lessons.id"), nullable=False)
+    lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False)
     
     # * Audio file details
     audio_url = Column(String(500), nullable=False)
@@ -81,11 +94,11 @@ class LessonAudio(Base):
     processing_error = Column(Text, nullable=True)
     
     # * Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # * Relationships
-    lesson = relationship("Lesson", back_populates="lesson_audio")
+    lesson = relationship("Lesson", back_populates="audio")
     
     def __repr__(self):
         return f"<LessonAudio for Lesson:{self.lesson_id}>"
@@ -94,10 +107,14 @@ class LessonAudio(Base):
 class LessonProgress(Base):
     
     __tablename__ = "lesson_progress"
-    
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_lesson_progress_student_lesson", "student_id", "lesson_id", unique=True),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    lesson_id = Column(Integer, ForeignKey("lessons.id"), nullable=False)
+    lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False)
     
     # * Progress tracking
     is_completed = Column(Boolean, default=False)
@@ -108,9 +125,9 @@ class LessonProgress(Base):
     last_position = Column(Integer, default=0)  # ? in seconds
     
     # * Timestamps
-    started_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime, server_default=func.now())
     completed_at = Column(DateTime, nullable=True)
-    last_accessed = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    last_accessed = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # * Relationships
     lesson = relationship("Lesson", back_populates="progress")
@@ -119,8 +136,14 @@ class LessonProgress(Base):
         return f"<LessonProgress Student:{self.student_id} Lesson:{self.lesson_id}>"
 
 
-def get_lessons_by_course(db, course_id: int):
-    return db.query(Lesson).filter(Lesson.course_id == course_id, Lesson.is_published == True).order_by(Lesson.order_index).all()
+async def get_lessons_by_course(db, course_id: int):
+    result = await db.execute(
+        select(Lesson)
+        .where(Lesson.course_id == course_id, Lesson.is_published == True)
+        .order_by(Lesson.order_index)
+    )
+    return result.scalars().all()
+
 
-def get_lesson(db, lesson_id: int):
-    return db.query(Lesson).filter(Lesson.id == lesson_id).first()
+async def get_lesson(db, lesson_id: int):
+    return await db.get(Lesson, lesson_id)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Float, Index, select
+from sqlalchemy.orm import relationship, selectinload
 from datetime import datetime
 import enum
 from .session import Base
@@ -18,7 +18,7 @@ class Quiz(Base):
     __tablename__ = "quizzes"
     
     id = Column(Integer, primary_key=True, index=True)
-    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
     
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
@@ -51,8 +51,8 @@ class Quiz(Base):
     
     # * Relationships
     course = relationship("Course", back_populates="quizzes")
-    questions = relationship("Question", back_populates="quiz", cascade="all, delete-orphan")
-    attempts = relationship("QuizAttempt", back_populates="quiz", cascade="all, delete-orphan")
+    questions = relationship("Question", back_populates="quiz", order_by="Question.order_index", cascade="all, delete-orphan", passive_deletes=True)
+    attempts = relationship("QuizAttempt", back_populates="quiz", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
         return f"<Quiz {self.title}>"
@@ -63,7 +63,7 @@ class Question(Base):
     __tablename__ = "questions"
     
     id = Column(Integer, primary_key=True, index=True)
-    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False)
     
     question_text = Column(Text, nullable=False)
     question_type = Column(Enum(QuestionType), nullable=False)
@@ -94,18 +94,26 @@ class Question(Base):
     
     # * Relationships
     quiz = relationship("Quiz", back_populates="questions")
-    answers = relationship("Answer", back_populates="question", cascade="all, delete-orphan")
+    answers = relationship("Answer", back_populates="question", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
         return f"<Question {self.id} ({self.question_type})>"
 
 
 class QuizAttempt(Base):
-    
+
     __tablename__ = "quiz_attempts"
-    
+    __table_args__ = (
+        # Covers the active-attempt lookup in submit_quiz, the attempt count
+        # in start_quiz and the per-student listing in get_my_attempts
+        Index("ix_attempt_quiz_student", "quiz_id", "student_id"),
+        # Covers get_all_my_attempts: filter on (student, completed) with the
+        # ORDER BY time_submitted DESC served straight off the index
+        Index("ix_attempt_student_submitted", "student_id", "is_completed", "time_submitted"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
-    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # * Attempt info
@@ -130,7 +138,7 @@ class QuizAttempt(Base):
     # * Relationships
     quiz = relationship("Quiz", back_populates="attempts")
     student = relationship("User", back_populates="quiz_attempts")
-    answers = relationship("Answer", back_populates="attempt", cascade="all, delete-orphan")
+    answers = relationship("Answer", back_populates="attempt", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
         return f"<QuizAttempt Quiz:{self.quiz_id} Student:{self.student_id} #{self.attempt_number}>"
@@ -141,8 +149,8 @@ class Answer(Base):
     __tablename__ = "answers"
     
     id = Column(Integer, primary_key=True, index=True)
-    attempt_id = Column(Integer, ForeignKey("quiz_attempts.id"), nullable=False)
-    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    attempt_id = Column(Integer, ForeignKey("quiz_attempts.id", ondelete="CASCADE"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
     
     # * Student's answer
     answer_text = Column(Text, nullable=True)
@@ -169,9 +177,29 @@ class Answer(Base):
 
 
 
-def get_quizzes_by_course(db, course_id: int):
-    return db.query(Quiz).filter(Quiz.course_id == course_id, Quiz.is_published == True).all()
+async def get_quizzes_by_course(db, course_id: int):
+    result = await db.execute(
+        select(Quiz).where(Quiz.course_id == course_id, Quiz.is_published == True)
+    )
+    return result.scalars().all()
+
+
+async def get_quizzes_for_courses(db, course_ids):
+    """All published quizzes for the given courses, questions preloaded"""
+    if not course_ids:
+        return []
+    result = await db.execute(
+        select(Quiz)
+        .options(selectinload(Quiz.questions))
+        .where(Quiz.course_id.in_(course_ids), Quiz.is_published == True)
+    )
+    return result.scalars().all()
 
 
-def get_quiz(db, quiz_id: int):
-    return db.query(Quiz).filter(Quiz.id == quiz_id).first()
+async def get_quiz(db, quiz_id: int):
+    # Questions are preloaded: callers iterate them, and an async session
+    # cannot lazy-load on attribute access
+    result = await db.execute(
+        select(Quiz).options(selectinload(Quiz.questions)).where(Quiz.id == quiz_id)
+    )
+    return result.scalars().first()
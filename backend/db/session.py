@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -9,12 +10,67 @@ DATABASE_URL = os.getenv(
     "sqlite:///./e4a_platform.db"
 )
 
+
+def _async_database_url(url: str) -> str:
+    """Map the configured URL to its async driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql+psycopg2://"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = _async_database_url(DATABASE_URL)
+
+# Explicit pool sizing: the defaults (pool_size=5) throttle every endpoint
+# under load. SQLite ignores most pool settings, so only tune real servers.
+_pool_kwargs = {}
+if not DATABASE_URL.startswith("sqlite"):
+    _pool_kwargs = dict(
+        pool_size=20,
+        max_overflow=40,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        pool_timeout=5,
+    )
+
+# Statement logging costs real CPU per query; keep it opt-in for debugging
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+
+# The app's distinct SELECT skeletons comfortably exceed the default
+# compiled-statement cache (500); size it so none recompile under load
+_QUERY_CACHE_SIZE = 1200
+
 # Engine
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(DATABASE_URL, echo=SQL_ECHO, query_cache_size=_QUERY_CACHE_SIZE, **_pool_kwargs)
+
+# Async engine (used by the async route handlers)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=SQL_ECHO, query_cache_size=_QUERY_CACHE_SIZE, **_pool_kwargs)
+
+# SQLite does not enforce foreign keys (and their ON DELETE CASCADE) by default
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_fk_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_sqlite_fk_pragma_async(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async session factory
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -26,3 +82,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async dependency for FastAPI
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -12,9 +12,17 @@ class UserRole(str, enum.Enum):
 
 
 class User(Base):
-    
+
     __tablename__ = "users"
-    
+    # Fetch server-generated timestamps via RETURNING at flush time instead
+    # of expiring them and paying a reload SELECT on next access
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Admin listing filters on role and pages by id; the keyset scan
+        # comes straight off this index
+        Index("ix_users_role_id", "role", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
@@ -33,8 +41,8 @@ class User(Base):
     reset_token = Column(String(255), nullable=True)
     
     # * Timestamps
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     last_login = Column(DateTime, nullable=True)
     
     # * Relationships
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
@@ -16,7 +17,7 @@ from api.feedback import router as feedback_router
 from api.voice import router as voice_router
 
 from db.models import create_tables
-from db.session import SessionLocal
+from db.session import SessionLocal, engine, async_engine
 from db.users import User, UserRole
 from core.security import hash_password
 
@@ -75,6 +76,7 @@ app = FastAPI(
     description="Accessible learning platform for all students including visually impaired users",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
@@ -112,7 +114,11 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "db_pool": engine.pool.status(),
+        "async_db_pool": async_engine.pool.status(),
+    }
 
 
 
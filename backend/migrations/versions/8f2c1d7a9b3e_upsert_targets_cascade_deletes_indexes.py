@@ -0,0 +1,140 @@
+"""Upsert conflict targets, cascading deletes and covering indexes
+
+Brings a database created by an older create_all() up to the current model
+schema. create_all() only creates missing tables — it never alters existing
+ones — so installations with a persistent volume need this migration for:
+
+* the unique constraints the ON CONFLICT upserts target
+  (submissions, enrollments, lesson_audio, lesson_progress)
+* ON DELETE CASCADE on the child-table foreign keys, which the
+  single-statement course/quiz deletes rely on
+* the covering indexes behind the hot listing queries
+* server-side now() defaults for the timestamp columns that used to be
+  filled in by the ORM
+
+Fresh databases get all of this from create_all() at startup; mark them
+with `alembic stamp head` instead of upgrading.
+
+The foreign-key swap runs only on PostgreSQL: SQLite cannot drop its
+unnamed constraints in place, and the SQLite file is a disposable dev
+database that create_all() rebuilds with the new schema anyway.
+
+Revision ID: 8f2c1d7a9b3e
+Revises:
+Create Date: 2026-08-31 16:42:10.184524
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "8f2c1d7a9b3e"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (table, column, referred table) for every FK that gained ON DELETE CASCADE.
+# The dropped names are PostgreSQL's defaults for the previously unnamed FKs.
+_CASCADE_FKS = [
+    ("enrollments", "course_id", "courses"),
+    ("lessons", "course_id", "courses"),
+    ("lesson_audio", "lesson_id", "lessons"),
+    ("lesson_progress", "lesson_id", "lessons"),
+    ("assignments", "course_id", "courses"),
+    ("submissions", "assignment_id", "assignments"),
+    ("quizzes", "course_id", "courses"),
+    ("questions", "quiz_id", "quizzes"),
+    ("quiz_attempts", "quiz_id", "quizzes"),
+    ("answers", "attempt_id", "quiz_attempts"),
+    ("answers", "question_id", "questions"),
+    ("feedback", "submission_id", "submissions"),
+]
+
+# Timestamp columns whose default moved from the ORM to the database; an
+# un-migrated server would otherwise insert NULLs once the ORM stopped
+# sending values
+_SERVER_DEFAULT_COLUMNS = [
+    ("users", "created_at"),
+    ("users", "updated_at"),
+    ("courses", "created_at"),
+    ("courses", "updated_at"),
+    ("enrollments", "enrolled_at"),
+    ("lessons", "created_at"),
+    ("lessons", "updated_at"),
+    ("lesson_audio", "created_at"),
+    ("lesson_audio", "updated_at"),
+    ("lesson_progress", "started_at"),
+    ("lesson_progress", "last_accessed"),
+    ("assignments", "created_at"),
+    ("assignments", "updated_at"),
+    ("submissions", "submitted_at"),
+    ("feedback", "created_at"),
+    ("feedback", "updated_at"),
+]
+
+# (name, table, columns, unique)
+_INDEXES = [
+    ("ix_lesson_audio_lesson_id", "lesson_audio", ["lesson_id"], True),
+    ("ix_lesson_progress_student_lesson", "lesson_progress", ["student_id", "lesson_id"], True),
+    ("ix_users_role_id", "users", ["role", "id"], False),
+    ("ix_enrollments_course_id", "enrollments", ["course_id"], False),
+    ("ix_lessons_course_pub_order", "lessons", ["course_id", "is_published", "order_index"], False),
+    ("ix_assignments_course_published", "assignments", ["course_id", "is_published"], False),
+    ("ix_attempt_quiz_student", "quiz_attempts", ["quiz_id", "student_id"], False),
+    ("ix_attempt_student_submitted", "quiz_attempts", ["student_id", "is_completed", "time_submitted"], False),
+    ("ix_feedback_student_created", "feedback", ["student_id", "created_at"], False),
+    ("ix_feedback_teacher_created", "feedback", ["teacher_id", "created_at"], False),
+]
+
+
+def upgrade() -> None:
+    # Conflict targets for the ON CONFLICT DO UPDATE upserts (batch mode:
+    # SQLite cannot ADD CONSTRAINT in place)
+    with op.batch_alter_table("submissions") as batch:
+        batch.create_unique_constraint(
+            "uq_submission_assignment_student", ["assignment_id", "student_id"]
+        )
+    with op.batch_alter_table("enrollments") as batch:
+        batch.create_unique_constraint(
+            "uq_enrollment_student_course", ["student_id", "course_id"]
+        )
+
+    for name, table, columns, unique in _INDEXES:
+        op.create_index(name, table, columns, unique=unique)
+
+    for table, column in _SERVER_DEFAULT_COLUMNS:
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                column, existing_type=sa.DateTime(), server_default=sa.func.now()
+            )
+
+    if op.get_bind().dialect.name == "postgresql":
+        for table, column, referred in _CASCADE_FKS:
+            name = f"{table}_{column}_fkey"
+            op.drop_constraint(name, table, type_="foreignkey")
+            op.create_foreign_key(
+                name, table, referred, [column], ["id"], ondelete="CASCADE"
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        for table, column, referred in reversed(_CASCADE_FKS):
+            name = f"{table}_{column}_fkey"
+            op.drop_constraint(name, table, type_="foreignkey")
+            op.create_foreign_key(name, table, referred, [column], ["id"])
+
+    for table, column in reversed(_SERVER_DEFAULT_COLUMNS):
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                column, existing_type=sa.DateTime(), server_default=None
+            )
+
+    for name, table, _columns, _unique in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
+
+    with op.batch_alter_table("enrollments") as batch:
+        batch.drop_constraint("uq_enrollment_student_course", type_="unique")
+    with op.batch_alter_table("submissions") as batch:
+        batch.drop_constraint("uq_submission_assignment_student", type_="unique")
@@ -0,0 +1,36 @@
+"""arq worker for durable background jobs.
+
+Run with: arq worker.WorkerSettings
+
+TTS synthesis is seconds-long and model-bound; running it here instead of
+in-process BackgroundTasks means an API restart can't lose a job, failures
+are retried, and synthesis load scales independently of HTTP workers.
+"""
+import os
+from arq.connections import RedisSettings
+
+from api.lessons import generate_tts_background
+from api.assignments import generate_instructions_tts_background
+from api.quizzes import generate_quiz_tts_background, generate_question_tts_background
+
+
+async def generate_tts(ctx, lesson_id: int, content_text: str, language: str = "en"):
+    generate_tts_background(lesson_id, content_text, language)
+
+
+async def generate_instructions_tts(ctx, assignment_id: int, instructions: str, language: str = "en"):
+    generate_instructions_tts_background(assignment_id, instructions, language)
+
+
+async def generate_quiz_tts(ctx, quiz_id: int, instructions: str, language: str = "en"):
+    generate_quiz_tts_background(quiz_id, instructions, language)
+
+
+async def generate_question_tts(ctx, question_id: int, question_text: str, explanation: str, language: str = "en"):
+    generate_question_tts_background(question_id, question_text, explanation, language)
+
+
+class WorkerSettings:
+    functions = [generate_tts, generate_instructions_tts, generate_quiz_tts, generate_question_tts]
+    redis_settings = RedisSettings.from_dsn(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    max_tries = 3
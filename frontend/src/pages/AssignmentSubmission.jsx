@@ -86,19 +86,11 @@ export default function AssignmentSubmission() {
         jsonData.file = file;
       }
 
-      if (submission) {
-        // Update existing submission
-        await api.post(`/assignments/submit/${jsonData.assignment_id}`, jsonData, {
-          headers: {'Content-Type': 'application/json'}
-        });
-        toast.success('Submission updated!');
-      } else {
-        // New submission
-        await api.post(`/assignments/submit`, jsonData, {
-          headers: { 'Content-Type': 'application/json' }
-        });
-        toast.success('Assignment submitted successfully!');
-      }
+      // Single idempotent endpoint: creates on first submit, updates after
+      await api.put(`/assignments/${jsonData.assignment_id}/submission`, jsonData, {
+        headers: { 'Content-Type': 'application/json' }
+      });
+      toast.success(submission ? 'Submission updated!' : 'Assignment submitted successfully!');
       
       loadAssignment();
     } catch (error) {